@@ -0,0 +1,116 @@
+"""
+RishFlow v2.0 - Activity Log Writer
+Single background writer thread that batches activity rows into WAL-mode SQLite
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+POLICY_BLOCK = 'block'  # producers wait while the queue is full
+POLICY_DROP = 'drop'    # rows are discarded (and counted) while the queue is full
+
+
+class ActivityLogWriter:
+    """Queue-fed SQLite writer shared by the webview and Qt frontends.
+
+    Callers enqueue parameter tuples for one INSERT statement; the writer
+    thread commits them in one transaction per batch_size rows or per
+    flush_interval seconds, whichever comes first. The database runs in WAL
+    mode so readers (get_logs) never wait for the writer. When producers
+    outrun the disk, the queue fills up to max_queue rows and the policy
+    decides between blocking the producer and dropping the row.
+    """
+
+    def __init__(self, db_path, insert_sql, batch_size=500, flush_interval=0.25,
+                 max_queue=10000, policy=POLICY_BLOCK):
+        self.db_path = db_path
+        self.insert_sql = insert_sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rishflow-activity-log')
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, *params):
+        """Queue one row; returns False if it was dropped by back-pressure"""
+        if self._closed:
+            return False
+        if self.policy == POLICY_DROP:
+            try:
+                self._queue.put_nowait(params)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            self._queue.put(params)
+        return True
+
+    def flush(self, timeout=5.0):
+        """Block until every row queued before this call is committed"""
+        if self._closed or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.DatabaseError as e:
+            print(f"Database error: {e}")
+
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            rows = []
+            waiters = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    # Flush request: commit what we have right away
+                    waiters.append(item)
+                    break
+                else:
+                    rows.append(item)
+                    if len(rows) >= self.batch_size:
+                        break
+                if stop:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(self.insert_sql, rows)
+                    self.written += len(rows)
+                except sqlite3.DatabaseError as e:
+                    print(f"Database error: {e}")
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
@@ -4,19 +4,130 @@ Advanced classification using Computer Vision + OCR + Rules
 100% Python 3.13 compatible - No ML dependencies
 """
 
-import cv2
-import numpy as np
 import os
-import pytesseract
-from PIL import Image, ImageEnhance
 from pathlib import Path
 from datetime import datetime
 import hashlib
 import re
-from collections import defaultdict
+import time
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from code_lang import LanguageDetector, is_script
+from doc_text import extract_text
+from lazy_imports import lazy
+from ocr import OCRTimeout, get_engine
+from rules import get_ruleset
+
+# Loaded on first use so importing this module stays cheap
+cv2 = lazy('cv2')
+np = lazy('numpy')
+Image = lazy('PIL.Image')
+
+# Bump when a content classifier changes so cached results are not reused
+CLASSIFIER_VERSION = 10
+
+# Image cascade tuning
+DECODE_TARGET_SIDE = 1024   # long side (px) the reduced decode aims for
+OCR_RESULTS_KEPT = 8        # recent files whose OCR result is kept for other heuristics
+SCREENSHOT_EDGE_DENSITY = 0.08  # Canny(100, 200) edge fraction of the reduced gray image
+# Full-screen captures come out at exactly a display resolution (either orientation)
+SCREEN_SIZES = frozenset(size for w, h in [
+    (1280, 720), (1280, 800), (1366, 768), (1440, 900), (1536, 864), (1600, 900),
+    (1680, 1050), (1920, 1080), (1920, 1200), (2560, 1440), (2560, 1600),
+    (2880, 1800), (3024, 1964), (3456, 2234), (3840, 2160),  # desktops, laptops
+    (750, 1334), (828, 1792), (1080, 1920), (1080, 2340), (1080, 2400), (1125, 2436),
+    (1170, 2532), (1179, 2556), (1242, 2688), (1284, 2778), (1290, 2796), (1440, 3200),  # phones
+] for size in ((w, h), (h, w)))
+# Batch features (classify_images): letterboxed BGR thumbnails stacked per batch
+THUMB_SIDE = 256
+IMAGE_BATCH = 32
+MIN_TEXT_CONTRAST = 12.0    # thumbnails flatter than this (gray std) are not OCRed
+EXIF_MAKE = 0x010F
+EXIF_MODEL = 0x0110
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class _Fallback(str):
+    """Category given after an error or a spent time budget: used, but never cached"""
+    __slots__ = ()
+
+
+def _cacheable(category):
+    return not isinstance(category, _Fallback)
+
+
+def _remaining(deadline):
+    """Seconds left before deadline (0 means no limit to the OCR engine)"""
+    if deadline is None:
+        return 0
+    left = deadline - time.perf_counter()
+    if left <= 0:
+        raise _BudgetExceeded()
+    return left
+
+
+class StageStats:
+    """Per-stage call counts, decisive hits and time spent (seconds)"""
 
-class AISmartSorter:
     def __init__(self):
+        self.stats = {}
+
+    def record(self, name, seconds, hit=False):
+        entry = self.stats.setdefault(name, [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += int(hit)
+        entry[2] += seconds
+
+    @contextmanager
+    def stage(self, name, deadline=None):
+        """Time a stage; raises _BudgetExceeded before it starts if time is up"""
+        _remaining(deadline)
+        marker = _StageMarker()
+        start = time.perf_counter()
+        try:
+            yield marker
+        finally:
+            self.record(name, time.perf_counter() - start, marker.decided)
+
+    def report(self):
+        return {
+            name: {'calls': calls, 'hits': hits, 'seconds': round(seconds, 4),
+                   'ms_per_call': round(seconds / calls * 1000, 2) if calls else 0.0}
+            for name, (calls, hits, seconds) in self.stats.items()
+        }
+
+
+class _StageMarker:
+    decided = False
+
+    def hit(self):
+        self.decided = True
+
+
+def classifier_key():
+    """Identifies the classifier + AI Smart rules that produced a cached result"""
+    return f"v{CLASSIFIER_VERSION}:{get_ruleset('AI Smart').fingerprint}"
+
+class AISmartSorter:
+    # Content classifiers for the "handler" rules of the AI Smart rule set
+    HANDLERS = {'image': 'classify_image', 'document': 'classify_document', 'code': 'classify_code'}
+
+    def __init__(self, cache=None, time_budget=2.0, budget_fallback='Images/Others'):
+        self.rules = get_ruleset('AI Smart')
+        # Seconds one image may take before it gets budget_fallback (None = no limit)
+        self.time_budget = time_budget
+        self.budget_fallback = budget_fallback
+        self.stages = StageStats()
+        self._ocr_results = OrderedDict()  # path -> OCRResult
+        self._decoders = None  # thread pool for classify_images
+        self.decode_threads = min(8, os.cpu_count() or 1)
+        self.languages = LanguageDetector()
+        self.cache = cache  # optional ClassificationCache for content classifiers
         # Load OpenCV cascades for face/screenshot detection
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.profile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_profileface.xml')
@@ -24,71 +135,201 @@ class AISmartSorter:
     def classify_file(self, file_path):
         """Main classification entry point - returns folder path"""
         file_path = Path(file_path)
-        ext = file_path.suffix.lower()
         
-        # Extension-based quick classification
-        if ext in self.IMAGE_EXTS:
-            return self.classify_image(file_path)
-        elif ext in self.DOC_EXTS:
-            return self.classify_document(file_path)
-        elif ext in self.CODE_EXTS:
-            return self.classify_code(file_path)
-        elif ext in self.VIDEO_EXTS:
-            return 'Videos'
-        elif ext in self.AUDIO_EXTS:
-            return 'Audio'
-        elif ext in self.ARCHIVE_EXTS:
-            return 'Archives'
-        elif ext in self.EXECUTABLE_EXTS:
-            return 'Executables'
-        else:
-            return self.classify_generic(file_path)
+        # Rule-based quick classification (sort_rules.json, "AI Smart")
+        rule = self.rules.match(file_path.name, stat=lambda: self.rules.file_stat(file_path))
+        handler = _handler(rule, file_path)
+        if handler:
+            if self.cache is None:
+                return getattr(self, self.HANDLERS[handler])(file_path)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return getattr(self, self.HANDLERS[handler])(file_path)
+            category, digest = self.cache.lookup(str(file_path), st)
+            if category is None:
+                category = getattr(self, self.HANDLERS[handler])(file_path)
+                if _cacheable(category):
+                    self.cache.put(str(file_path), category, st, digest)
+            return category
+        return self.rules.render(rule, file_path.name, stat=lambda: self.rules.file_stat(file_path))
     
-    def classify_image(self, image_path):
-        """AI-powered image classification"""
+    def classify_image(self, image_path, features=None):
+        """AI-powered image classification: a staged cascade that stops at the first decisive stage.
+
+        Stages, cheapest first: file header (dimensions, camera EXIF),
+        reduced-resolution grayscale decode, face cascades, screen-resolution
+        dimensions (no camera EXIF), edge density,
+        OCR text density, then colour. Every stage checks the per-file time
+        budget; running out returns budget_fallback. features (from
+        image_features) supplies the decode, edge and colour stages.
+        Fallbacks (budget, errors) are not cached, so the next pass retries.
+        """
+        image_path = Path(image_path)
+        deadline = time.perf_counter() + self.time_budget if self.time_budget else None
         try:
-            img = cv2.imread(str(image_path))
-            if img is None:
+            return self._image_cascade(image_path, deadline, features)
+        except _BudgetExceeded:
+            self.stages.record('budget', 0.0, hit=True)
+            return _Fallback(self.budget_fallback)
+        except Exception:
+            return _Fallback('Images/Others')
+
+    def _image_cascade(self, image_path, deadline, features=None):
+        # 1. HEADER: dimensions and EXIF without decoding pixels
+        with self.stages.stage('header', deadline):
+            if features is not None:
+                width, height, from_camera = features.header
+            else:
+                width, height, from_camera = self._image_header(image_path)
+
+        # 2. DECODE at reduced resolution, grayscale (libjpeg scales while decoding)
+        with self.stages.stage('decode', deadline):
+            gray = features.gray if features is not None else \
+                self._read_reduced(image_path, width, height, color=False)
+            if gray is None:
                 return 'Images/Others'
-                
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # 1. FACE DETECTION → Family Photos
+
+        # 3. FACE DETECTION → Family Photos
+        with self.stages.stage('faces', deadline) as stage:
             faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-            profiles = self.profile_cascade.detectMultiScale(gray, 1.1, 4)
-            
-            if len(faces) > 0 or len(profiles) > 0:
+            if len(faces) == 0:
+                faces = self.profile_cascade.detectMultiScale(gray, 1.1, 4)
+            if len(faces) > 0:
+                stage.hit()
                 return f'Images/Family/{image_path.stem[:20]}'  # Truncate long names
-                
-            # 2. SCREENSHOT DETECTION (high contrast + edges)
-            edges = cv2.Canny(gray, 100, 200)
-            edge_density = np.sum(edges > 0) / (gray.shape[0] * gray.shape[1])
-            
-            if edge_density > 0.08:
-                return 'Images/Screenshots'
-            
-            # 3. RECEIPT/INVOICE DETECTION (text-heavy)
-            text_score = self.estimate_text_density(gray)
+
+        # 4. SCREENSHOT DETECTION (display resolution, then edges); camera photos are never screenshots
+        if not from_camera:
+            with self.stages.stage('dimensions', deadline) as stage:
+                if (width, height) in SCREEN_SIZES:
+                    stage.hit()
+                    return 'Images/Screenshots'
+            with self.stages.stage('edges', deadline) as stage:
+                density = features.edge_density if features is not None else _edge_density(gray)
+                if density > SCREENSHOT_EDGE_DENSITY:
+                    stage.hit()
+                    return 'Images/Screenshots'
+
+        # 5. RECEIPT/INVOICE DETECTION (text-heavy) - OCR only when nothing cheaper decided
+        if features is not None:
+            with self.stages.stage('contrast', deadline) as stage:
+                if features.contrast < MIN_TEXT_CONTRAST:
+                    stage.hit()
+                    return 'Images/Photos'  # too flat to hold readable text
+        with self.stages.stage('ocr', deadline) as stage:
+            text_score = self.estimate_text_density(gray, timeout=_remaining(deadline), path=image_path)
             if text_score > 0.15:
+                stage.hit()
                 return f'Images/Receipts/{datetime.now().strftime("%Y/%m/%d")}_{image_path.stem}'
-            
-            # 4. MEMES (colorful + text overlay)
-            if self.is_colorful(img) and text_score > 0.05:
-                return 'Images/Memes'
-                
-            return 'Images/Photos'
-            
+
+        # 6. MEMES (colorful + text overlay)
+        if text_score > 0.05:
+            with self.stages.stage('color', deadline) as stage:
+                if features is not None:
+                    colorful = features.saturation > 80
+                else:
+                    img = self._read_reduced(image_path, width, height, color=True)
+                    colorful = img is not None and self.is_colorful(img)
+                if colorful:
+                    stage.hit()
+                    return 'Images/Memes'
+
+        return 'Images/Photos'
+
+    def classify_images(self, paths, batch_size=IMAGE_BATCH):
+        """Classify many images at once; returns categories in input order.
+
+        Each batch is decoded on a thread pool into reduced grayscale images
+        (for faces, edges and OCR) and letterboxed thumbnails; the decode
+        threads also measure edge density, the same Canny measure as the
+        single-image path. Saturation and contrast are then computed for
+        the whole batch as array operations (see thumbnail_features).
+        """
+        paths = [Path(p) for p in paths]
+        categories = [None] * len(paths)
+        todo = []
+        for i, path in enumerate(paths):
+            st = digest = None
+            if self.cache is not None:
+                try:
+                    st = os.stat(path)
+                    categories[i], digest = self.cache.lookup(str(path), st)
+                except OSError:
+                    st = None
+            if categories[i] is None:
+                todo.append((i, path, st, digest))
+
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            features = self.image_features([path for _, path, _, _ in batch])
+            for (i, path, st, digest), feature in zip(batch, features):
+                categories[i] = self.classify_image(path, feature)
+                if st is not None and _cacheable(categories[i]):
+                    self.cache.put(str(path), categories[i], st, digest)
+        return categories
+
+    def image_features(self, paths):
+        """ImageFeatures per path"""
+        started = time.perf_counter()
+        if self._decoders is None:
+            # OpenCV releases the GIL while decoding and resizing
+            self._decoders = ThreadPoolExecutor(max_workers=self.decode_threads)
+        decoded = list(self._decoders.map(self._decode_for_batch, paths))
+        ready = [item for item in decoded if item.gray is not None]
+        if ready:
+            saturation, contrast = thumbnail_features(
+                np.stack([item.thumb for item in ready]), np.array([item.thumb_size for item in ready]))
+            for item, sat, con in zip(ready, saturation, contrast):
+                item.saturation, item.contrast = float(sat), float(con)
+                item.thumb = None
+        elapsed = time.perf_counter() - started
+        for _ in paths:
+            self.stages.record('batch', elapsed / len(paths))
+        return decoded
+
+    def _decode_for_batch(self, image_path):
+        header = self._image_header(image_path)
+        img = self._read_reduced(image_path, header[0], header[1], color=True)
+        if img is None:
+            return ImageFeatures(header, None)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # Keep the aspect ratio: scale the long side to THUMB_SIDE, pad the rest
+        height, width = img.shape[:2]
+        scale = THUMB_SIDE / max(height, width)
+        size = (max(1, min(THUMB_SIDE, round(height * scale))), max(1, min(THUMB_SIDE, round(width * scale))))
+        thumb = np.zeros((THUMB_SIDE, THUMB_SIDE, 3), np.uint8)
+        thumb[:size[0], :size[1]] = cv2.resize(
+            img, (size[1], size[0]), interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        features = ImageFeatures(header, gray, thumb, size)
+        features.edge_density = _edge_density(gray)
+        return features
+
+    def _image_header(self, image_path):
+        """(width, height, has camera EXIF) from the file header; zeros if unreadable"""
+        try:
+            with Image.open(image_path) as img:
+                width, height = img.size
+                exif = img.getexif()
+                return width, height, bool(exif.get(EXIF_MAKE) or exif.get(EXIF_MODEL))
         except Exception:
-            return 'Images/Others'
+            return 0, 0, False
+
+    def _read_reduced(self, image_path, width, height, color):
+        """Decode at 1/2, 1/4 or 1/8 scale so the long side lands near DECODE_TARGET_SIDE"""
+        scale = max(width, height) / DECODE_TARGET_SIDE if width else 2
+        for factor in (8, 4, 2):
+            if scale >= factor:
+                flag = getattr(cv2, f"IMREAD_REDUCED_{'COLOR' if color else 'GRAYSCALE'}_{factor}")
+                break
+        else:
+            flag = cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE
+        return cv2.imread(str(image_path), flag)
     
     def classify_document(self, doc_path):
-        """OCR-powered document classification"""
+        """Document classification from the text layer (OCR only for scanned pages)"""
         try:
-            # Quick OCR for receipts/invoices
-            text = pytesseract.image_to_string(
-                Image.open(doc_path), 
-                config='--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .,-/()'
-            )
+            text = self.document_text(doc_path)
             
             text_lower = text.lower()
             
@@ -104,32 +345,33 @@ class AISmartSorter:
                 return f'Documents/{doc_path.parent.name}/{doc_path.stem}'
                 
         except Exception:
-            return f'Documents/{doc_path.stem}'
+            return _Fallback(f'Documents/{doc_path.stem}')
+    
+    def document_text(self, doc_path):
+        """Text of a document: its own text first, OCR only where there is none"""
+        result = extract_text(doc_path, ocr=lambda gray: get_engine().recognize(self._enhance(gray)).text)
+        if result is not None:
+            return result.text
+        # No text route for this format (e.g. an image saved as a document): OCR the file
+        return self.ocr(doc_path).text
     
     def classify_code(self, code_path):
-        """Programming language detection"""
+        """Programming language detection (extension, shebang, then a keyword scan)"""
         try:
-            with open(code_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(2048)  # First 2KB
-                
-            lang = self.detect_language(content)
+            lang = self.languages.detect_path(code_path)
             return f'Code/{lang}/{code_path.stem}'
             
         except Exception:
-            return f'Code/{code_path.stem}'
+            return _Fallback(f'Code/{code_path.stem}')
     
     def classify_generic(self, file_path):
-        """File size + age based classification"""
-        stat = file_path.stat()
-        size_mb = stat.st_size / (1024 * 1024)
-        age_days = (datetime.now().timestamp() - stat.st_ctime) / 86400
-        
-        if size_mb > 100:
-            return 'Large_Files'
-        elif age_days > 365:
-            return 'Old_Files'
-        else:
-            return 'Misc'
+        """File size + age based classification (the extension-less rules of AI Smart)"""
+        size, ctime = self.rules.file_stat(file_path)
+        now = datetime.now().timestamp()
+        for rule in self.rules.candidates(''):
+            if not rule.handler and rule.check(size, ctime, now):
+                return rule.target.text
+        return self.rules.default.text
     
     def extract_date(self, text):
         """Extract YYYY-MM-DD from text"""
@@ -145,17 +387,43 @@ class AISmartSorter:
                 return match.group(1).replace('/', '-')
         return datetime.now().strftime('%Y-%m-%d')
     
-    def estimate_text_density(self, gray_image):
-        """Estimate text presence in image"""
+    def ocr(self, path, gray_image=None, timeout=0):
+        """OCRResult for a file, computed once and shared by every heuristic.
+
+        gray_image is the already decoded image, if the caller has one;
+        otherwise the file is decoded here.
+        """
+        key = str(path)
+        result = self._ocr_results.get(key)
+        if result is not None:
+            self._ocr_results.move_to_end(key)
+            return result
+        if gray_image is None:
+            gray_image = cv2.imread(key, cv2.IMREAD_GRAYSCALE)
+            if gray_image is None:
+                raise ValueError(f"Cannot decode image: {path}")
+        result = get_engine().recognize(self._enhance(gray_image), timeout)
+        self._ocr_results[key] = result
+        if len(self._ocr_results) > OCR_RESULTS_KEPT:
+            self._ocr_results.popitem(last=False)
+        return result
+    
+    def _enhance(self, gray_image):
         # Enhance contrast for better OCR detection
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray_image)
-        
+        return clahe.apply(gray_image)
+    
+    def estimate_text_density(self, gray_image, timeout=0, path=None):
+        """Estimate text presence in image (timeout in seconds, 0 = none)"""
         # OCR confidence as text density proxy
-        data = pytesseract.image_to_data(enhanced, output_type=pytesseract.Output.DICT)
-        text_conf = [int(conf) for conf in data['conf'] if int(conf) > 30]
-        
-        return len(text_conf) / max(len(data['text']), 1)
+        try:
+            if path is not None:
+                result = self.ocr(path, gray_image, timeout)
+            else:
+                result = get_engine().recognize(self._enhance(gray_image), timeout)
+        except OCRTimeout:
+            raise _BudgetExceeded()
+        return result.density()
     
     def is_colorful(self, img):
         """Detect colorful images (memes vs photos)"""
@@ -165,33 +433,214 @@ class AISmartSorter:
     
     def detect_language(self, content):
         """Detect programming language from code"""
-        keywords = {
-            'python': ['def ', 'import ', 'class ', 'print('],
-            'javascript': ['function', 'const ', 'let ', '=>'],
-            'cpp': ['#include', 'cout', 'cin', 'int main'],
-            'java': ['public class', 'System.out', 'import '],
-            'html': ['<html', '<div', '<script'],
-            'css': ['selector', ':hover', 'display:', 'background']
-        }
-        
-        scores = defaultdict(int)
-        content_lower = content.lower()
-        
-        for lang, words in keywords.items():
-            for word in words:
-                if word in content_lower:
-                    scores[lang] += 1
-        
-        return max(scores, key=scores.get) if scores else 'unknown'
+        return self.languages.detect_text(content)
+
+class ImageFeatures:
+    """One image of a classify_images batch: header, reduced gray image and batch features"""
+    __slots__ = ('header', 'gray', 'thumb', 'thumb_size', 'edge_density', 'saturation', 'contrast')
+
+    def __init__(self, header, gray, thumb=None, thumb_size=None):
+        self.header = header
+        self.gray = gray
+        self.thumb = thumb
+        self.thumb_size = thumb_size  # (height, width) of the image inside the padded thumbnail
+        self.edge_density = self.saturation = self.contrast = 0.0
+
+
+def _edge_density(gray):
+    """Fraction of Canny edge pixels: screenshots and scanned pages are edge-dense"""
+    return np.count_nonzero(cv2.Canny(gray, 100, 200)) / gray.size
+
+
+def thumbnail_features(thumbs, sizes):
+    """(mean HSV saturation, gray contrast) for an N x S x S x 3 BGR stack.
+
+    Thumbnails are letterboxed: sizes (N x 2) gives the height and width of
+    the image in each one. The black padding adds zero to every sum below,
+    so dividing by the image's own pixel count leaves it out.
+    """
+    pixels = sizes[:, 0] * sizes[:, 1]
+    # Saturation as OpenCV computes it: (max - min) / max, scaled to 0..255
+    # (element-wise across channels: a max over a length-3 last axis is ~20x slower)
+    blue, green, red = thumbs[..., 0], thumbs[..., 1], thumbs[..., 2]
+    high = np.maximum(np.maximum(blue, green), red).astype(np.float32)
+    low = np.minimum(np.minimum(blue, green), red)
+    saturation = ((high - low) * 255 / np.maximum(high, 1)).sum(axis=(1, 2), dtype=np.float64) / pixels
+    gray = thumbs @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    mean = gray.sum(axis=(1, 2), dtype=np.float64) / pixels
+    squares = np.square(gray).sum(axis=(1, 2), dtype=np.float64) / pixels
+    contrast = np.sqrt(np.maximum(squares - mean * mean, 0))
+    return saturation, contrast
+
+
+# File extension mappings, derived from the AI Smart rule set
+_AI_RULES = get_ruleset('AI Smart')
+AISmartSorter.IMAGE_EXTS = _AI_RULES.extensions(handler='image')
+AISmartSorter.DOC_EXTS = _AI_RULES.extensions(handler='document')
+AISmartSorter.CODE_EXTS = _AI_RULES.extensions(handler='code')
+AISmartSorter.VIDEO_EXTS = _AI_RULES.extensions(target='Videos')
+AISmartSorter.AUDIO_EXTS = _AI_RULES.extensions(target='Audio')
+AISmartSorter.ARCHIVE_EXTS = _AI_RULES.extensions(target='Archives')
+AISmartSorter.EXECUTABLE_EXTS = _AI_RULES.extensions(target='Executables')
+
+
+# Per-process sorter for ClassificationPipeline workers (cascades load once per worker)
+_worker_sorter = None
+
+
+def _init_worker():
+    global _worker_sorter
+    # One core per worker: OpenCV's and Tesseract's own thread pools would
+    # otherwise oversubscribe the machine once every core runs a worker
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    cv2.setNumThreads(1)
+    _worker_sorter = AISmartSorter()
+    _worker_sorter.decode_threads = 2
+
+
+def _classify_in_worker(path):
+    return _worker_sorter.classify_file(path)
+
+
+def _classify_images_in_worker(paths):
+    return _worker_sorter.classify_images(paths)
+
+
+class ClassificationPipeline:
+    """Classify files on a process pool, streaming results in input order.
+
+    Only files routed to a content classifier (image, document, code) cross
+    the process boundary; everything the AI Smart rules decide from name,
+    size or age is answered in the calling process, and so is every file the
+    optional ClassificationCache already knows. Images travel in batches of
+    up to image_batch paths, classified by classify_images so decoding and
+    thumbnail features are batched inside the worker too. At most
+    max_in_flight files are outstanding, so memory stays flat on huge
+    folders and results start flowing while the input is still being produced.
+
+    A file its worker failed on comes back with the exception as its
+    category, so the caller can skip it. If the pool itself breaks (a worker
+    died or its initializer failed) classify raises BrokenProcessPool: no
+    result can be trusted, and the next classify starts a fresh pool.
+    """
+
+    def __init__(self, workers=None, max_in_flight=None, cache=None, image_batch=IMAGE_BATCH):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers * image_batch * 2
+        # Small enough that the in-flight window keeps every worker busy
+        self.image_batch = max(1, min(image_batch, self.max_in_flight // (2 * self.workers)))
+        self.rules = get_ruleset('AI Smart')
+        self.cache = cache
+        self._pool = None
+        self._images = []  # _Pending images not submitted yet
+
+    def classify(self, items, path_of=None):
+        """Yield (item, category) for every item, in order.
+
+        items are paths, or anything path_of(item) turns into a path (e.g.
+        FileRecords with path_of=lambda r: r.path).
+        """
+        window = deque()
+        try:
+            for item in items:
+                path = path_of(item) if path_of else item
+                window.append((item, self._route(path)))
+                while len(window) >= self.max_in_flight or (window and _done(window[0][1])):
+                    yield self._result(*window.popleft())
+            self._submit_images()
+            while window:
+                yield self._result(*window.popleft())
+        except BrokenProcessPool:
+            self._discard_pool()
+            raise
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _discard_pool(self):
+        self._images = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _route(self, path):
+        name = os.path.basename(path)
+        stat = lambda: self.rules.file_stat(path)
+        rule = self.rules.match(name, stat=stat)
+        handler = _handler(rule, path)
+        if not handler:
+            return self.rules.render(rule, name, stat=stat)
+        st = digest = None
+        if self.cache is not None:
+            try:
+                st = os.stat(path)
+                category, digest = self.cache.lookup(str(path), st)
+                if category is not None:
+                    return category
+            except OSError:
+                st = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        if handler == 'image':
+            pending = _Pending(None, str(path), st, digest, len(self._images))
+            self._images.append(pending)
+            if len(self._images) >= self.image_batch:
+                self._submit_images()
+            return pending
+        return _Pending(self._pool.submit(_classify_in_worker, str(path)), str(path), st, digest)
+
+    def _submit_images(self):
+        if not self._images:
+            return
+        future = self._pool.submit(_classify_images_in_worker, [p.path for p in self._images])
+        for pending in self._images:
+            pending.future = future
+        self._images = []
+
+    def _result(self, item, category):
+        if not isinstance(category, _Pending):
+            return item, category
+        if category.future is None:
+            self._submit_images()  # the oldest result waits on a partial batch
+        try:
+            result = category.future.result()
+            if category.index is not None:
+                result = result[category.index]
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            print(f"[ClassificationPipeline] Worker error: {e}")
+            return item, e
+        if category.st is not None and _cacheable(result):
+            self.cache.put(category.path, result, category.st, category.digest)
+        return item, result
+
+
+class _Pending:
+    __slots__ = ('future', 'path', 'st', 'digest', 'index')
+
+    def __init__(self, future, path, st, digest=None, index=None):
+        self.future = future  # None until the image batch is submitted
+        self.path = path
+        self.st = st
+        self.digest = digest  # content hash computed by the cache lookup, reused by put
+        self.index = index    # position in the image batch's result list
+
+
+def _done(category):
+    return not isinstance(category, _Pending) or (category.future is not None and category.future.done())
+
+
+def _handler(rule, path):
+    """Content classifier for a file: its rule's handler, or 'code' for an extension-less "#!" script"""
+    if rule is not None and rule.handler:
+        return rule.handler
+    if is_script(path):
+        return 'code'
+    return None
 
-# File extension mappings
-AISmartSorter.IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg'}
-AISmartSorter.DOC_EXTS = {'.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt'}
-AISmartSorter.CODE_EXTS = {'.py', '.js', '.ts', '.cpp', '.c', '.h', '.java', '.html', '.css', '.scss', '.json', '.xml'}
-AISmartSorter.VIDEO_EXTS = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm'}
-AISmartSorter.AUDIO_EXTS = {'.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a'}
-AISmartSorter.ARCHIVE_EXTS = {'.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'}
-AISmartSorter.EXECUTABLE_EXTS = {'.exe', '.msi', '.deb', '.rpm', '.dmg', '.app'}
 
 # Usage example
 if __name__ == "__main__":
@@ -209,3 +658,16 @@ if __name__ == "__main__":
     for test_file in test_files:
         category = sorter.classify_file(test_file)
         print(f"{test_file} → {category}")
+    
+    # Batch API over a folder of images: python ai_sorter.py <folder>
+    import sys
+    if len(sys.argv) > 1:
+        images = [p for p in Path(sys.argv[1]).rglob('*') if p.suffix.lower() in AISmartSorter.IMAGE_EXTS]
+        start = time.perf_counter()
+        sorter.classify_images(images)
+        elapsed = time.perf_counter() - start
+        print(f"classify_images: {len(images)} images, {elapsed / max(len(images), 1) * 1000:.1f} ms/image")
+    
+    # Where the image cascade spent its time
+    for name, info in sorter.stages.report().items():
+        print(f"{name:8s} {info['calls']:5d} calls {info['hits']:5d} hits {info['ms_per_call']:8.2f} ms/call")
@@ -3,16 +3,31 @@ RishFlow v2.0 - Smart File Organizer
 HTML Dashboard UI with Python Backend
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import webview
 import os
 import json
 import threading
-import shutil
-from pathlib import Path
-from datetime import datetime
 import sqlite3
-from ai_sorter import AISmartSorter
 from duplicate_finder import DuplicateFinder
+from scanner import scan_folder, stat_record
+from catalog import FileCatalog
+from folder_stats import FolderStats, SubtreeRollups
+from watcher import FolderWatcher
+from planner import MovePlan, NameIndex, PlannedMove, build_plan, execute_plan
+from mover import FileMover, ParallelMoveExecutor, throughput_mb_s
+from journal import OperationJournal
+from revert import revert_moves
+from activity_log import ActivityLogWriter
+from rules import get_ruleset
+from doc_text import extract_text
+from jobs import JobConflict, JobScheduler, PLANNING, RUNNING, COMPLETE, CANCELLED, FAILED
+from lazy_imports import STARTUP_BUDGET_S, lazy_loads
+
+# OpenCV, Tesseract, PIL and pypdf are not imported here; they load on first AI/dedupe/PDF use
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 # App paths
 def resource_path(relative_path):
@@ -29,16 +44,36 @@ APP_ICON = resource_path("logo.ico")
 FOLDER_NAME = "stitch_rishflow_dashboard_home (1)"
 UI_HTML = resource_path(os.path.join(FOLDER_NAME, "code.html"))
 
+# Planned moves are checkpointed to the journal in chunks of this many files
+PLAN_CHECKPOINT_EVERY = 1000
+
 class RishFlowAPI:
     """Backend API for the dashboard"""
     
     def __init__(self):
         self.db_path = "rishflow_activity.db"
         self.init_database()
-        self.organizer_thread = None
-        self.last_operations = []
-        self._ops_lock = threading.Lock()
         self._last_ops_file = "last_ops.json"
+        # Append-only move journal; older last_ops.json files become a run
+        self.journal = OperationJournal("rishflow_journal.jsonl")
+        self.journal.import_legacy(self._last_ops_file)
+        self._watch_run_id = None
+        self._watch_job = None
+        self._active_runs = set()
+        # Background jobs (organize, duplicate scan, index): a shared worker budget,
+        # status/cancel handles, progress pushed a few times per second
+        self.jobs = JobScheduler(self._publish_jobs, max_workers=3)
+        # Persistent listing cache: repeat scans only re-list changed directories
+        self.catalog = FileCatalog("rishflow_catalog.db")
+        self._rollups = SubtreeRollups(self.catalog)
+        self._scan_seq = 0
+        self._source_refreshes = {}  # folder -> Event set when its background refresh ends
+        self._refresh_lock = threading.Lock()
+        self._cancelled_scans = set()
+        self.watcher = None
+        self.mover = FileMover()
+        # Shared by all runs so per-device caps hold across organize and watch mode
+        self.move_executor = ParallelMoveExecutor(self.mover)
         
     def init_database(self):
         """Initialize SQLite activity log"""
@@ -55,21 +90,21 @@ class RishFlowAPI:
             )
         ''')
         self.conn.commit()
+        # All inserts go through one background writer that commits in batches
+        self.activity_writer = ActivityLogWriter(self.db_path, '''
+            INSERT INTO activity_log (action, source_file, destination, status)
+            VALUES (?, ?, ?, ?)
+        ''')
     
     def log_activity(self, action, source="", destination="", status="success"):
         """Log an activity to the database"""
-        try:
-            self.cursor.execute('''
-                INSERT INTO activity_log (action, source_file, destination, status)
-                VALUES (?, ?, ?, ?)
-            ''', (action, source, destination, status))
-            self.conn.commit()
-        except Exception as e:
-            print(f"Database error: {e}")
+        self.activity_writer.log(action, source, destination, status)
     
     def get_logs(self):
         """Get recent activity logs (thread-safe)"""
         try:
+            # Make rows still queued in the writer visible
+            self.activity_writer.flush()
             conn = sqlite3.connect(self.db_path, check_same_thread=False)
             cur = conn.cursor()
             cur.execute('SELECT id, timestamp, action, source_file, destination, status FROM activity_log ORDER BY timestamp DESC LIMIT 50')
@@ -111,8 +146,8 @@ class RishFlowAPI:
             print(f"[browse_folder] Error: {e}")
             return {"error": str(e)}
     
-    def start_organizing(self, source_path, dest_path, sort_mode):
-        """Start file organization in background thread"""
+    def start_organizing(self, source_path, dest_path, sort_mode, priority=0):
+        """Queue file organization as a background job"""
         if not os.path.isdir(source_path):
             return {"error": "Invalid source folder"}
         
@@ -122,92 +157,130 @@ class RishFlowAPI:
             except Exception as e:
                 return {"error": f"Cannot create destination folder: {str(e)}"}
         
-        # Clear recorded operations for a fresh run
-        with self._ops_lock:
-            self.last_operations = []
-
-        # Start organizing in a background thread
-        self.organizer_thread = threading.Thread(
-            target=self._organize_files,
-            args=(source_path, dest_path, sort_mode),
-            daemon=True
-        )
-        self.organizer_thread.start()
+        # The run id (for revert/resume) is assigned when the job starts
+        try:
+            job = self.jobs.submit(
+                'organize',
+                lambda job: self._organize_files(source_path, dest_path, sort_mode, None, False, job),
+                priority=priority,
+                writes=(source_path, dest_path),
+                source=source_path, dest=dest_path, mode=sort_mode
+            )
+        except JobConflict as e:
+            return {"error": str(e)}
         
         self.log_activity(f"Started organizing with {sort_mode} mode", source_path, dest_path, "in_progress")
-        return {"status": "organizing", "mode": sort_mode}
+        return {"status": job.state, "mode": sort_mode, "job_id": job.id}
     
-    def _organize_files(self, source_path, dest_path, sort_mode):
+    def resume_run(self, run_id, priority=0):
+        """Continue an interrupted organize run from its journal checkpoints.
+
+        Files whose move is already journaled are skipped, and files that were
+        already classified reuse the checkpointed destination.
+        """
+        run = self.journal.run(run_id)
+        if run is None:
+            return {"error": "Unknown run"}
+        if run_id in self._active_runs:
+            return {"error": "Run is still in progress"}
+        if run['reverted'] or run['status'] == 'complete':
+            return {"error": "Run already finished"}
+        if run['mode'] == 'legacy' or run['mode'].startswith('watch:'):
+            return {"error": "Only organize runs can be resumed"}
+        if not os.path.isdir(run['source']):
+            return {"error": "Invalid source folder"}
+
+        try:
+            job = self.jobs.submit(
+                'organize',
+                lambda job: self._organize_files(run['source'], run['dest'], run['mode'], run_id, True, job),
+                priority=priority,
+                writes=(run['source'], run['dest']),
+                source=run['source'], dest=run['dest'], mode=run['mode'], run_id=run_id
+            )
+        except JobConflict as e:
+            return {"error": str(e)}
+
+        self.log_activity(f"Resuming run {run_id}", run['source'], run['dest'], "in_progress")
+        return {"status": job.state, "mode": run['mode'], "run_id": run_id, "job_id": job.id}
+
+    def start_indexing(self, folder_path, priority=0):
+        """Build the local AI search index for a folder as a background job"""
+        if not os.path.isdir(folder_path):
+            return {"error": "Invalid folder"}
+        try:
+            job = self.jobs.submit(
+                'index', lambda job: self.index_for_ai(folder_path),
+                priority=priority, reads=(folder_path,), folder=folder_path
+            )
+        except JobConflict as e:
+            return {"error": str(e)}
+        return {"status": job.state, "job_id": job.id}
+
+    def get_job(self, job_id):
+        """Progress snapshot of one background job (with its result once finished)"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"error": "Unknown job"}
+        snapshot = job.snapshot()
+        if job.result is not None:
+            snapshot['result'] = job.result
+        return snapshot
+
+    def get_jobs(self):
+        """Progress snapshots of all known jobs, newest first"""
+        jobs = sorted(self.jobs.jobs(), key=lambda j: j.created, reverse=True)
+        return {"jobs": [job.snapshot() for job in jobs]}
+
+    def cancel_job(self, job_id):
+        """Cancel a queued job, or ask a running one to stop (moves in flight still finish)"""
+        if self._watch_job is not None and self._watch_job.id == job_id:
+            return self.stop_watching()
+        if not self.jobs.cancel(job_id):
+            return {"error": "Job is not running"}
+        return {"status": "cancelling", "job_id": job_id}
+
+    def _publish_jobs(self, snapshots):
+        # One evaluate_js call carries every job that changed since the last push
+        self._notify_ui(f"window.onJobProgress && window.onJobProgress({json.dumps(snapshots)})")
+
+    def _organize_files(self, source_path, dest_path, sort_mode, run_id=None, resume=False, job=None):
         """Actually organize files based on sort mode"""
+        if run_id is None:
+            run_id = self.journal.begin_run(source_path, dest_path, sort_mode)
+        elif resume:
+            self.journal.resume_run(run_id)
+        if job is not None:
+            job.meta['run_id'] = run_id
+        self._active_runs.add(run_id)
         try:
-            files_moved = 0
-            files_skipped = 0
-            
-            for filename in os.listdir(source_path):
-                source_file = os.path.join(source_path, filename)
-                
-                # Skip directories
-                if os.path.isdir(source_file):
-                    continue
-                
-                # Determine destination folder based on sort mode
-                if sort_mode == "File Extension":
-                    # Get file extension
-                    _, ext = os.path.splitext(filename)
-                    folder_name = ext.lstrip('.').upper() or "NO_EXTENSION"
-                elif sort_mode == "Date Modified":
-                    # Organize by modification date
-                    mod_time = os.path.getmtime(source_file)
-                    folder_name = datetime.fromtimestamp(mod_time).strftime("%Y-%m-%d")
-                elif sort_mode == "Size Category":
-                    # Organize by file size
-                    size = os.path.getsize(source_file)
-                    if size < 1024 * 1024:  # < 1MB
-                        folder_name = "Small (< 1MB)"
-                    elif size < 100 * 1024 * 1024:  # < 100MB
-                        folder_name = "Medium (1-100MB)"
-                    else:
-                        folder_name = "Large (> 100MB)"
-                else:  # AI-based Content
-                    # Simple classification based on file type
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext in ['.pdf', '.doc', '.docx', '.txt', '.xlsx']:
-                        folder_name = "Documents"
-                    elif ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                        folder_name = "Images"
-                    elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
-                        folder_name = "Videos"
-                    elif ext in ['.mp3', '.wav', '.flac', '.aac']:
-                        folder_name = "Audio"
-                    else:
-                        folder_name = "Other"
-                
-                # Create destination folder
-                folder_path = os.path.join(dest_path, folder_name)
-                os.makedirs(folder_path, exist_ok=True)
-                
-                # Move file
-                dest_file = os.path.join(folder_path, filename)
-                try:
-                    shutil.move(source_file, dest_file)
-                    # track move for possible revert
-                    try:
-                        with self._ops_lock:
-                            self.last_operations.append((dest_file, source_file))
-                            # persist last ops to disk so revert works across restarts/crashes
-                            try:
-                                with open(self._last_ops_file, 'w', encoding='utf-8') as _f:
-                                    json.dump([list(x) for x in self.last_operations], _f)
-                            except Exception:
-                                pass
-                    except Exception:
-                        pass
-
-                    self._log_activity_threadsafe(f"Moved to {folder_name}", filename, dest_file, "success")
-                    files_moved += 1
-                except Exception as e:
-                    self._log_activity_threadsafe(f"Failed to move", filename, folder_name, "error")
-                    files_skipped += 1
+            # Phase 1: plan every move (checkpointed so a crash does not lose it)
+            if job is not None:
+                job.start(PLANNING)
+            plan = self._checkpointed_plan(run_id, source_path, dest_path, sort_mode, resume, job)
+            if plan is None:
+                # Cancelled while planning; the partial plan stays checkpointed
+                self._finish_cancelled(job, run_id, 0, source_path, dest_path)
+                return
+            totals = plan.totals()
+            self._log_activity_threadsafe(
+                f"Planned {totals['files']} files ({totals['bytes']} bytes) into {totals['folders']} folders",
+                source_path,
+                dest_path,
+                "in_progress"
+            )
+
+            # Phase 2: create folders once, then move in locality order
+            if job is not None:
+                job.set_totals(totals['files'], totals['bytes'])
+                job.start(RUNNING)
+            files_moved, files_skipped = self._execute_plan(plan, run_id, job)
+            if job is not None and job.cancelled:
+                self._finish_cancelled(job, run_id, files_moved, source_path, dest_path)
+                return
+            self.journal.end_run(run_id)
+            if job is not None:
+                self.jobs.finish(job, COMPLETE)
             
             # Log completion
             self._log_activity_threadsafe(
@@ -218,29 +291,245 @@ class RishFlowAPI:
             )
 
             # Notify UI (if available) that organizing completed so it can refresh
-            try:
-                js = f"window.onOrganizeComplete && window.onOrganizeComplete({json.dumps(source_path)})"
-                if webview.windows:
-                    webview.windows[0].evaluate_js(js)
-            except Exception:
-                pass
+            self._notify_ui(f"window.onOrganizeComplete && window.onOrganizeComplete({json.dumps(source_path)})")
             
         except Exception as e:
+            self.journal.end_run(run_id, 'error')
+            if job is not None:
+                self.jobs.finish(job, FAILED, str(e))
             self._log_activity_threadsafe(f"Organization error: {str(e)}", source_path, dest_path, "error")
+        finally:
+            self._active_runs.discard(run_id)
+
+    def _finish_cancelled(self, job, run_id, files_moved, source_path, dest_path):
+        # A cancelled run can be continued later with resume_run
+        self.journal.end_run(run_id, 'cancelled')
+        self.jobs.finish(job, CANCELLED)
+        self._log_activity_threadsafe(
+            f"Organization cancelled: {files_moved} files moved",
+            source_path,
+            dest_path,
+            "cancelled"
+        )
+        self._notify_ui(f"window.onOrganizeComplete && window.onOrganizeComplete({json.dumps(source_path)})")
+
+    def _checkpointed_plan(self, run_id, source_path, dest_path, sort_mode, resume=False, job=None):
+        """MovePlan of the moves run_id still has to make (None if job was cancelled).
+
+        A fresh run plans from one scandir pass and journals the plan in
+        chunks. A resumed run reloads those chunks, only classifies files the
+        interrupted run had not planned yet, and drops moves already journaled.
+        """
+        moves, complete = self.journal.plan(run_id) if resume else ([], False)
+        moves = [PlannedMove(*m) for m in moves]
+        if not complete:
+            # One name index for the whole run; names of reloaded moves stay taken
+            names = NameIndex()
+            for m in moves:
+                names.reserve(m.dest_dir, m.name)
+            planned = {m.source for m in moves}
+            chunk = []
+            for record in scan_folder(source_path):
+                if record.path in planned:
+                    continue
+                chunk.append(record)
+                if len(chunk) >= PLAN_CHECKPOINT_EVERY:
+                    if job is not None and job.cancelled:
+                        return None
+                    moves.extend(self._plan_chunk(run_id, chunk, dest_path, sort_mode, names))
+                    chunk = []
+            if chunk:
+                moves.extend(self._plan_chunk(run_id, chunk, dest_path, sort_mode, names))
+            self.journal.plan_complete(run_id, len(moves))
+
+        if resume:
+            done = {orig for _, orig in self.journal.operations(run_id)}
+            if done:
+                self._log_activity_threadsafe(
+                    f"Resuming: {len(done)} files already moved",
+                    source_path,
+                    dest_path,
+                    "in_progress"
+                )
+                moves = [m for m in moves if m.source not in done]
+        return MovePlan(os.path.abspath(dest_path), moves)
+
+    def _plan_chunk(self, run_id, records, dest_path, sort_mode, names):
+        moves = self._plan_organize(records, dest_path, sort_mode, names).moves
+        self.journal.record_plan(run_id, moves)
+        return moves
     
-    def _log_activity_threadsafe(self, action, source="", destination="", status="success"):
-        """Log activity in a thread-safe manner"""
+    def start_watching(self, source_path, dest_path, sort_mode):
+        """Continuously organize files as they arrive in the source folder (Linux inotify).
+
+        Only new arrivals are handled; run start_organizing once for files
+        that are already there.
+        """
+        if not os.path.isdir(source_path):
+            return {"error": "Invalid source folder"}
         try:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO activity_log (action, source_file, destination, status)
-                VALUES (?, ?, ?, ?)
-            ''', (action, source, destination, status))
-            conn.commit()
-            conn.close()
+            os.makedirs(dest_path, exist_ok=True)
         except Exception as e:
-            print(f"Database error: {e}")
+            return {"error": f"Cannot create destination folder: {str(e)}"}
+
+        self.stop_watching()
+        # The session writes to both folders until stopped, like a job that never ends
+        try:
+            session = self.jobs.hold('watch', writes=(source_path, dest_path),
+                                     source=source_path, dest=dest_path, mode=sort_mode)
+        except JobConflict as e:
+            return {"error": str(e)}
+        run_id = self.journal.begin_run(source_path, dest_path, f"watch:{sort_mode}")
+        session.meta['run_id'] = run_id
+        watcher = FolderWatcher(
+            source_path,
+            lambda paths: self._organize_batch(paths, source_path, dest_path, sort_mode, run_id),
+            on_overflow=lambda: self._queue_overflow_pass(source_path, dest_path, sort_mode, session)
+        )
+        try:
+            watcher.start()
+        except OSError as e:
+            self.journal.end_run(run_id, 'error')
+            self.jobs.finish(session, FAILED, str(e))
+            return {"error": f"Watch mode unavailable: {e.strerror or e}"}
+        self.watcher = watcher
+        self._watch_run_id = run_id
+        self._watch_job = session
+
+        self.log_activity(f"Watching with {sort_mode} mode", source_path, dest_path, "in_progress")
+        return {"status": "watching", "mode": sort_mode, "job_id": session.id}
+
+    def stop_watching(self):
+        """Stop watch mode if it is running"""
+        if not self.watcher:
+            return {"status": "not_watching"}
+        self.watcher.stop()
+        folder = self.watcher.folder
+        self.watcher = None
+        self.journal.end_run(self._watch_run_id)
+        self._watch_run_id = None
+        self.jobs.finish(self._watch_job, COMPLETE)
+        self._watch_job = None
+        self._log_activity_threadsafe("Stopped watching", folder, "", "success")
+        return {"status": "stopped"}
+
+    def get_watch_status(self):
+        """Report whether watch mode is active and on which folder"""
+        if self.watcher and self.watcher.running:
+            return {"watching": True, "folder": self.watcher.folder}
+        return {"watching": False}
+
+    def _queue_overflow_pass(self, source_path, dest_path, sort_mode, session):
+        """Watcher callback: events were dropped, so organize the whole folder as a job"""
+        try:
+            self.jobs.submit(
+                'organize',
+                lambda job: self._organize_files(source_path, dest_path, sort_mode, None, False, job),
+                writes=(source_path, dest_path), parent=session,
+                source=source_path, dest=dest_path, mode=sort_mode
+            )
+        except JobConflict:
+            # A pass for this session is already queued or running
+            print("[watch] Overflow pass already pending")
+
+    def _organize_batch(self, paths, source_path, dest_path, sort_mode, run_id):
+        """Watcher callback: organize a batch of settled new files"""
+        records = []
+        for path in paths:
+            try:
+                records.append(stat_record(path))
+            except OSError:
+                continue  # removed or renamed since it settled
+        try:
+            files_moved, _ = self._execute_plan(self._plan_organize(records, dest_path, sort_mode), run_id)
+        except Exception as e:
+            self._log_activity_threadsafe(f"Watch error: {str(e)}", source_path, dest_path, "error")
+            return
+
+        if files_moved:
+            self._log_activity_threadsafe(f"Watch: {files_moved} new files moved", source_path, dest_path, "success")
+            self._notify_ui(f"window.onOrganizeComplete && window.onOrganizeComplete({json.dumps(source_path)})")
+
+    def _destination_folder(self, record, sort_mode):
+        """Folder name (relative to the destination) for a FileRecord under sort_mode"""
+        # Each sort mode is a rule set in sort_rules.json; unknown modes use AI-based Content
+        rules = get_ruleset(sort_mode) or get_ruleset("AI-based Content")
+        return rules.classify(record.name, record.size, record.mtime)
+
+    def _plan_organize(self, records, dest_path, sort_mode, names=None):
+        """Build the MovePlan for FileRecords under sort_mode (never overwriting existing files)"""
+        return build_plan(
+            records, dest_path,
+            lambda record: self._destination_folder(record, sort_mode),
+            names if names is not None else NameIndex()
+        )
+
+    def _execute_plan(self, plan, run_id, job=None):
+        """Execute a MovePlan, journaling every move under run_id; returns (moved, skipped)"""
+        return execute_plan(
+            plan, self.mover,
+            on_moved=lambda move, dest_file, result: self._on_file_moved(run_id, move, dest_file, result, job),
+            on_failed=lambda move, error: self._on_move_failed(run_id, move, error, job),
+            executor=self.move_executor,
+            should_stop=(lambda: job.cancelled) if job is not None else None
+        )
+
+    def _on_file_moved(self, run_id, move, dest_file, result, job=None):
+        # track move for possible revert (one appended journal line, fsynced in groups)
+        try:
+            self.journal.record_move(run_id, dest_file, move.source)
+        except Exception as e:
+            print(f"Journal error: {e}")
+        if job is not None:
+            job.advance(1, move.size)
+
+        action = f"Moved to {os.path.basename(move.dest_dir)}"
+        rate = throughput_mb_s(result)
+        if rate is not None:
+            # Cross-device copy: record how fast it went
+            action += f" ({result.bytes / (1024 * 1024):.1f} MB at {rate:.1f} MB/s)"
+        self._log_activity_threadsafe(action, move.name, dest_file, "success")
+
+    def _on_move_failed(self, run_id, move, error, job=None):
+        dest_file = os.path.join(move.dest_dir, move.name)
+        if (isinstance(error, FileNotFoundError) and os.path.exists(dest_file)
+                and not os.path.lexists(move.source)):
+            # Moved just before a crash, but its journal line never hit the disk
+            self.journal.record_move(run_id, dest_file, move.source)
+            if job is not None:
+                job.advance(1, move.size)
+            return
+        if job is not None:
+            job.advance(0, failed=1)
+        self._log_activity_threadsafe(f"Failed to move", move.name, os.path.basename(move.dest_dir), "error")
+
+    def preview_organize(self, source_path, dest_path, sort_mode, limit=200):
+        """Dry run: return the move plan for the dashboard without touching any file"""
+        try:
+            if not os.path.isdir(source_path):
+                return {"error": "Invalid source folder"}
+
+            plan = self._plan_organize(scan_folder(source_path), dest_path, sort_mode)
+            moves = [
+                {
+                    'source': m.source,
+                    'destination': os.path.join(m.dest_dir, m.name),
+                    'size': m.size,
+                    'same_device': m.same_device
+                }
+                for m in plan.ordered()[:max(0, int(limit))]
+            ]
+            return {
+                'totals': plan.totals(),
+                'folders': plan.folder_counts(),
+                'moves': moves
+            }
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def _log_activity_threadsafe(self, action, source="", destination="", status="success"):
+        """Log activity in a thread-safe manner (queued to the batch writer)"""
+        self.activity_writer.log(action, source, destination, status)
 
     def scan_source(self, folder_path):
         """Return a list of files in the source folder for the UI"""
@@ -248,91 +537,170 @@ class RishFlowAPI:
             if not os.path.isdir(folder_path):
                 return {"error": "Invalid folder"}
 
-            files = []
-            for filename in os.listdir(folder_path):
-                full = os.path.join(folder_path, filename)
-                if os.path.isdir(full):
-                    continue
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                    ftype = 'image'
-                elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
-                    ftype = 'video'
-                elif ext in ['.pdf', '.doc', '.docx', '.txt', '.xlsx']:
-                    ftype = 'document'
-                elif ext in ['.zip', '.rar', '.7z']:
-                    ftype = 'archive'
-                else:
-                    ftype = 'other'
-
-                files.append({
-                    'name': filename,
-                    'type': ftype,
-                    'size': os.path.getsize(full),
-                    'modified': os.path.getmtime(full),
-                    'path': full
-                })
-
+            files = [self._file_dict(record) for record in self.catalog.scan(folder_path)]
             return {"files": files}
         except Exception as e:
             return {"error": str(e)}
 
-    def get_folder_stats(self, folder_path):
-        """Return aggregate stats for a folder: total files, total size, counts and largest files"""
+    def scan_source_page(self, folder_path, sort="name", descending=False, limit=200, cursor=None, offset=0):
+        """Return one page of the source folder's files.
+
+        Pass the returned next_cursor back to get the following page; it is
+        None on the last page. sort is one of name, size or mtime.
+
+        Page 1 never waits for a re-listing: a changed folder is served from
+        its last catalogued listing and one never seen is read straight from
+        scandir, while the catalog refreshes in the background (refreshing is
+        True, and onSourceRefreshed(folder) is pushed when new files showed
+        up). Later pages wait for that refresh.
+        """
         try:
             if not os.path.isdir(folder_path):
                 return {"error": "Invalid folder"}
 
-            total_files = 0
-            total_size = 0
-            count_by_type = {}
-            size_by_type = {}
-            largest = []
+            folder = os.path.abspath(folder_path)
+            limit = max(1, min(int(limit), 5000))
+            state = self.catalog.state(folder)
+            if state != 'fresh':
+                if cursor or offset:
+                    self._refresh_source(folder).wait()
+                elif state == 'missing':
+                    records, next_cursor, total = self.catalog.page_from_disk(folder, sort, bool(descending), limit)
+                    self._refresh_source(folder)
+                    return {
+                        "files": [self._file_dict(r) for r in records],
+                        "next_cursor": next_cursor,
+                        "total": total,
+                        "refreshing": True
+                    }
+
+            records, next_cursor = self.catalog.page(
+                folder, sort, bool(descending), limit, cursor, int(offset or 0)
+            )
+            if state == 'stale' and not (cursor or offset):
+                self._refresh_source(folder)
+            return {
+                "files": [self._file_dict(r) for r in records],
+                "next_cursor": next_cursor,
+                "total": self.catalog.count(folder),
+                "refreshing": state != 'fresh' and not (cursor or offset)
+            }
+        except Exception as e:
+            return {"error": str(e)}
 
-            for filename in os.listdir(folder_path):
-                full = os.path.join(folder_path, filename)
-                if os.path.isdir(full):
-                    continue
-                try:
-                    size = os.path.getsize(full)
-                except Exception:
-                    size = 0
+    def _refresh_source(self, folder):
+        """Refresh folder in the catalog on a background thread, once at a time; returns an Event set when done"""
+        with self._refresh_lock:
+            done = self._source_refreshes.get(folder)
+            if done is None:
+                done = self._source_refreshes[folder] = threading.Event()
+                threading.Thread(target=self._run_source_refresh, args=(folder, done), daemon=True).start()
+        return done
+
+    def _run_source_refresh(self, folder, done):
+        relisted = 0
+        try:
+            relisted = self.catalog.refresh(folder)
+        except Exception as e:
+            print(f"[scan_source_page] Refresh error: {e}")
+        finally:
+            with self._refresh_lock:
+                self._source_refreshes.pop(folder, None)
+            done.set()
+        if relisted:
+            self._notify_ui(f"window.onSourceRefreshed && window.onSourceRefreshed({json.dumps(folder)})")
+
+    def stream_source(self, folder_path, batch_size=500):
+        """Scan the source folder in the background, pushing batches to the UI.
+
+        The window receives onScanBatch(scanId, files) for every batch and
+        onScanComplete(scanId, total) at the end.
+        """
+        if not os.path.isdir(folder_path):
+            return {"error": "Invalid folder"}
 
-                total_files += 1
-                total_size += size
+        self._scan_seq += 1
+        scan_id = self._scan_seq
+        threading.Thread(
+            target=self._stream_source,
+            args=(scan_id, folder_path, max(1, int(batch_size))),
+            daemon=True
+        ).start()
+        return {"status": "streaming", "scan_id": scan_id}
 
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                    ftype = 'image'
-                elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
-                    ftype = 'video'
-                elif ext in ['.pdf', '.doc', '.docx', '.txt', '.xlsx']:
-                    ftype = 'document'
-                elif ext in ['.zip', '.rar', '.7z']:
-                    ftype = 'archive'
-                else:
-                    ftype = 'other'
+    def cancel_stream(self, scan_id):
+        """Stop pushing batches for a streaming scan"""
+        self._cancelled_scans.add(scan_id)
+        return {"status": "cancelled", "scan_id": scan_id}
 
-                count_by_type[ftype] = count_by_type.get(ftype, 0) + 1
-                size_by_type[ftype] = size_by_type.get(ftype, 0) + size
+    def _stream_source(self, scan_id, folder_path, batch_size):
+        total = 0
+        try:
+            for batch in self.catalog.iter_batches(folder_path, batch_size):
+                if scan_id in self._cancelled_scans:
+                    break
+                total += len(batch)
+                files = [self._file_dict(r) for r in batch]
+                self._notify_ui(f"window.onScanBatch && window.onScanBatch({scan_id}, {json.dumps(files)})")
+        except Exception as e:
+            print(f"[stream_source] Error: {e}")
+        finally:
+            self._cancelled_scans.discard(scan_id)
+            self._notify_ui(f"window.onScanComplete && window.onScanComplete({scan_id}, {total})")
+
+    def _file_dict(self, record):
+        """UI representation of a FileRecord"""
+        return {
+            'name': record.name,
+            'type': record.type,
+            'size': record.size,
+            'modified': record.mtime,
+            'path': record.path
+        }
+
+    def _notify_ui(self, js):
+        """Run a JS snippet in the dashboard window, if one is open"""
+        try:
+            if webview.windows:
+                webview.windows[0].evaluate_js(js)
+        except Exception:
+            pass
 
-                largest.append((size, filename, full))
+    def get_folder_stats(self, folder_path, recursive=False):
+        """Return aggregate stats for a folder: total files, total size, counts and largest files.
 
-            largest.sort(reverse=True)
-            largest_files = [{'name': f[1], 'size': f[0], 'path': f[2]} for f in largest[:10]]
+        With recursive=True the stats cover the whole tree and include a
+        rollup per immediate subdirectory; unchanged subtrees come from cache.
+        """
+        try:
+            if not os.path.isdir(folder_path):
+                return {"error": "Invalid folder"}
 
-            return {
-                'total_files': total_files,
-                'total_size': total_size,
-                'count_by_type': count_by_type,
-                'size_by_type': size_by_type,
-                'largest_files': largest_files
-            }
+            if not recursive:
+                with self._refresh_lock:
+                    pending = self._source_refreshes.get(os.path.abspath(folder_path))
+                if pending is not None:
+                    pending.wait()  # the queue's background refresh is already listing it
+                self.catalog.refresh(folder_path)
+                stats = FolderStats()
+                for batch in self.catalog.iter_files(folder_path):
+                    stats.add_all(batch)
+                return stats.as_dict()
+
+            self.catalog.refresh(folder_path, recursive=True)
+            result = self._rollups.rollup(folder_path).as_dict()
+            subdirs = [
+                {'name': os.path.basename(path), 'path': path,
+                 'total_files': sub.total_files, 'total_size': sub.total_size}
+                for path, sub in self._rollups.children(folder_path)
+            ]
+            result['subdirectories'] = sorted(subdirs, key=lambda d: d['total_size'], reverse=True)
+            return result
         except Exception as e:
             return {"error": str(e)}
 
     def index_for_ai(self, folder_path):
-        """Lightweight indexer: extracts text from .txt and (if available) .pdf files into memory for quick local search.
+        """Lightweight indexer: extracts text from .txt, .docx/.odt and (if pypdf is available) .pdf files into memory for quick local search.
         This is a small, privacy-first scaffold. For production RAG use LangChain + a vector DB.
         """
         try:
@@ -340,32 +708,18 @@ class RishFlowAPI:
                 return {"error": "Invalid folder"}
 
             index = []
-            # optional import for PDFs
-            try:
-                import pypdf
-            except Exception:
-                pypdf = None
-
             for filename in os.listdir(folder_path):
                 full = os.path.join(folder_path, filename)
                 if os.path.isdir(full):
                     continue
-                ext = os.path.splitext(filename)[1].lower()
                 text = ''
-                if ext == '.txt':
-                    try:
-                        with open(full, 'r', encoding='utf-8') as f:
-                            text = f.read()
-                    except Exception:
-                        text = ''
-                elif ext == '.pdf' and pypdf:
-                    try:
-                        reader = pypdf.PdfReader(full)
-                        pages = [p.extract_text() or '' for p in reader.pages]
-                        text = '\n'.join(pages)
-                    except Exception as ex:
-                        print(f"[index_for_ai] PDF extract error for {full}: {ex}")
-                        text = ''
+                try:
+                    # .txt, .pdf (text layer, all pages) and .docx/.odt
+                    extracted = extract_text(full, max_pages=None, max_bytes=None)
+                    if extracted is not None:
+                        text = extracted.text
+                except Exception as ex:
+                    print(f"[index_for_ai] Extract error for {full}: {ex}")
                 # store trimmed text for search
                 if text:
                     index.append({'path': full, 'name': filename, 'text': text})
@@ -412,104 +766,117 @@ class RishFlowAPI:
             print(f"[query_ai] Error: {e}")
             return {"error": str(e)}
 
-    def _cleanup_empty_folder(self, folder_path):
-        """Recursively remove empty folders"""
+    def get_startup_report(self):
+        """Backend import time against the startup budget, plus heavy modules loaded lazily since"""
+        return {
+            'import_s': round(IMPORT_SECONDS, 3),
+            'budget_s': STARTUP_BUDGET_S,
+            'within_budget': IMPORT_SECONDS <= STARTUP_BUDGET_S,
+            'lazy_loads': lazy_loads()
+        }
+
+    def get_runs(self):
+        """Journaled organize runs, newest first"""
         try:
-            if not os.path.exists(folder_path):
-                return
-
-            # Check for system files that might prevent deletion
-            items = os.listdir(folder_path)
-            # Filter ignored files
-            ignored = {'.DS_Store', 'Thumbs.db', 'desktop.ini'}
-            valid_items = [i for i in items if i not in ignored]
-
-            if not valid_items:
-                # If only system files exist, delete them
-                for i in items:
-                    try:
-                        os.remove(os.path.join(folder_path, i))
-                    except Exception:
-                        pass
-                
-                # Try to remove the folder
-                os.rmdir(folder_path)
-                self._log_activity_threadsafe("Cleanup", folder_path, "", "removed_empty_folder")
-                
-                # Recursively try to cleanup parent if also empty
-                # Be careful not to go too far up. As a heuristic, we stop if we can't delete (because it has other stuff)
-                # But here, we just call it on parent, and the first check 'if not valid_items' will stop if parent has other stuff.
-                parent = os.path.dirname(folder_path)
-                if parent and parent != folder_path: 
-                     self._cleanup_empty_folder(parent)
+            runs = list(reversed(self.journal.runs()))
+            for run in runs:
+                # Interrupted (crashed or failed) organize runs can be continued with resume_run
+                run['resumable'] = (
+                    run['status'] != 'complete' and not run['reverted']
+                    and run['run_id'] not in self._active_runs
+                    and run['mode'] != 'legacy' and not run['mode'].startswith('watch:')
+                )
+            return {"runs": runs}
         except Exception as e:
-            # It's okay if we can't remove it (might use by system or not empty)
-            pass
+            return {"error": str(e)}
 
-    def revert_last(self):
-        """Revert last organizing operation by moving files back to original locations."""
+    def revert_last(self, run_id=None):
+        """Revert an organizing run (the latest unreverted one by default) by moving files back."""
         try:
-            with self._ops_lock:
-                ops = list(self.last_operations)
-
-            # if no ops in memory, try loading from disk
-            if not ops and os.path.exists(self._last_ops_file):
-                try:
-                    with open(self._last_ops_file, 'r', encoding='utf-8') as _f:
-                        loaded = json.load(_f)
-                        ops = [(d[0], d[1]) for d in loaded]
-                except Exception:
-                    ops = []
-
-            if not ops:
+            if run_id is None:
+                run = self.journal.last_run()
+            else:
+                run = self.journal.run(run_id)
+            if run is None or not run['moves'] or run['reverted']:
                 return {"status": "no_ops"}
+            if run['run_id'] in self._active_runs:
+                return {"error": "Run is still in progress"}
 
-            reverted = 0
-            folders_to_check = set()
-
-            for dest, orig in reversed(ops):
-                if os.path.exists(dest):
-                    try:
-                        # track folder for potential cleanup
-                        folders_to_check.add(os.path.dirname(dest))
-
-                        # ensure original folder exists
-                        orig_folder = os.path.dirname(orig)
-                        os.makedirs(orig_folder, exist_ok=True)
-                        shutil.move(dest, orig)
-                        self._log_activity_threadsafe("Reverted move", os.path.basename(orig), orig, "success")
-                        reverted += 1
-                    except Exception:
-                        self._log_activity_threadsafe("Revert failed", os.path.basename(orig), orig, "error")
+            result = self._revert_run(run)
 
-            # Clean up empty folders
-            for folder in folders_to_check:
-                self._cleanup_empty_folder(folder)
+            # Notify UI (if available) that revert completed so it can refresh
+            self._notify_ui("window.onRevertComplete && window.onRevertComplete()")
 
-            # Clear recorded ops after revert
-            with self._ops_lock:
-                self.last_operations = []
+            return {"status": "reverted", "count": result.restored, "run_id": run['run_id'], **result.as_dict()}
+        except Exception as e:
+            return {"error": str(e)}
 
-            # Notify UI (if available) that revert completed so it can refresh
-            try:
-                js = "window.onRevertComplete && window.onRevertComplete()"
-                if webview.windows:
-                    webview.windows[0].evaluate_js(js)
-            except Exception:
-                pass
+    def revert_runs(self, levels=1):
+        """Multi-level undo: revert the newest `levels` unreverted runs, newest first"""
+        try:
+            reverted = []
+            for _ in range(max(0, int(levels))):
+                run = self.journal.last_run()
+                if run is None or run['run_id'] in self._active_runs:
+                    break
+                result = self._revert_run(run)
+                reverted.append({"run_id": run['run_id'], **result.as_dict()})
+                if result.failed:
+                    break  # the run stays unreverted; older runs wait until it is retried
+            if not reverted:
+                return {"status": "no_ops"}
 
-            return {"status": "reverted", "count": reverted}
+            self._notify_ui("window.onRevertComplete && window.onRevertComplete()")
+            return {
+                "status": "reverted",
+                "count": sum(r['restored'] for r in reverted),
+                "runs": reverted
+            }
         except Exception as e:
             return {"error": str(e)}
+
+    def _revert_run(self, run):
+        """Move a run's files back in parallel and drop the folders it emptied"""
+        result = revert_moves(
+            self.journal.operations(run['run_id']),
+            root=run['dest'] or None,
+            mover=self.mover,
+            executor=self.move_executor,
+            on_restored=lambda dest, orig: self._log_activity_threadsafe(
+                "Reverted move", os.path.basename(orig), orig, "success"),
+            on_failed=lambda dest, orig, error: self._log_activity_threadsafe(
+                "Revert failed", os.path.basename(orig), orig, "error")
+        )
+        for folder in result.removed_dirs:
+            self._log_activity_threadsafe("Cleanup", folder, "", "removed_empty_folder")
+
+        # Replaying this run again would find nothing to move back. With failures it
+        # stays revertable: a retry counts restored files as missing and retries the rest
+        if not result.failed:
+            self.journal.mark_reverted(run['run_id'])
+        return result
     
-    def find_duplicates(self, folder_path):
-        """Find duplicate files"""
+    def find_duplicates(self, folder_path, priority=0):
+        """Find duplicate files in a background job; the result comes with get_job"""
         if not os.path.isdir(folder_path):
             return {"error": "Invalid folder"}
-        
+        try:
+            job = self.jobs.submit(
+                'dedupe', lambda job: self._find_duplicates(folder_path, job),
+                priority=priority, reads=(folder_path,), folder=folder_path
+            )
+        except JobConflict as e:
+            return {"error": str(e)}
+        return {"status": job.state, "job_id": job.id}
+
+    def _find_duplicates(self, folder_path, job):
         finder = DuplicateFinder()
-        duplicates = finder.find_duplicates(folder_path)
-        self.log_activity("Duplicate scan", folder_path, "", "success")
+        duplicates = finder.find_duplicates(
+            folder_path,
+            progress=lambda record: job.advance(1, record.size),
+            should_stop=lambda: job.cancelled
+        )
+        self._log_activity_threadsafe("Duplicate scan", folder_path, "", "success")
         return {"duplicates": len(duplicates), "details": str(duplicates)}
 
 def create_app():
@@ -536,7 +903,7 @@ def create_app():
     return app, api
 
 def main():
-    print("Starting RishFlow v2.0...")
+    print(f"Starting RishFlow v2.0... (backend imported in {IMPORT_SECONDS:.3f}s)")
     
     # Verify HTML file exists (skip check for HTTP URLs)
     if not UI_HTML.startswith('http'):
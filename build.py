@@ -4,6 +4,7 @@ Build script for RishFlow Windows Desktop App
 Generates an executable with logo.ico as the app icon
 """
 
+import importlib.util
 import os
 import subprocess
 import sys
@@ -31,15 +32,21 @@ def build_app():
         "--add-data=stitch_rishflow_dashboard_home (1);stitch_rishflow_dashboard_home (1)",
         "--add-data=Logo.jpg;.",
         "--add-data=dark_theme.qss;.",
+        "--add-data=sort_rules.json;.",
         "--add-data=requirements.txt;.",
         "--hidden-import=cv2",
         "--hidden-import=pytesseract",
         "--hidden-import=PIL",
+        "--hidden-import=PIL.Image",
+        "--hidden-import=pypdf",
         "--hidden-import=numpy",
         "--hidden-import=imagehash",
         "--collect-all=webview",
         "app.py"
     ]
+    # Optional in-process OCR engine: bundled only where it is installed (no Windows wheels)
+    if importlib.util.find_spec("tesserocr") is not None:
+        cmd.insert(-1, "--hidden-import=tesserocr")
     
     try:
         print("\n📦 Running PyInstaller...")
@@ -0,0 +1,389 @@
+"""
+RishFlow v2.0 - Persistent File Catalog
+SQLite cache of folder listings, re-listed only when a directory's mtime changes
+"""
+
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+from scanner import FileRecord, ScanStats, file_type, iter_folder, scan_folder, stat_record
+
+# A directory whose mtime is this close to the moment we listed it may still
+# change within the same timestamp tick, so it is not trusted on the next refresh.
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+# ...but a racy listing is reused for this long, so back-to-back calls from one
+# dashboard refresh (queue page, then folder stats) do not each re-list it
+RACY_REUSE_NS = 1000 * 1000 * 1000
+
+# Re-listed directories are written to SQLite once this many files are pending
+STORE_BATCH_FILES = 20000
+
+# Sortable columns for paging (UI name -> column)
+SORT_COLUMNS = {'name': 'name', 'size': 'size', 'mtime': 'mtime_ns'}
+
+
+class FileCatalog:
+    """Persistent catalog of files keyed by directory.
+
+    Each directory row stores the mtime_ns it had when it was listed. A refresh
+    stats the directory (one syscall) and only re-lists it when that mtime
+    moved. Files edited in place do not touch their directory's mtime, so their
+    size/mtime in the catalog stays as of the last listing.
+    """
+
+    def __init__(self, db_path="rishflow_catalog.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._stored_at = {}  # folder -> monotonic time its racy listing was stored
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                mtime_ns INTEGER,
+                listed_ns INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent);
+            CREATE TABLE IF NOT EXISTS files (
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER,
+                mtime_ns INTEGER,
+                inode INTEGER,
+                type TEXT,
+                PRIMARY KEY (dir, name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_files_size ON files(dir, size, name);
+            CREATE INDEX IF NOT EXISTS idx_files_mtime ON files(dir, mtime_ns, name);
+        ''')
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # -- refresh -------------------------------------------------------------
+
+    def refresh(self, root, recursive=False, stats=None):
+        """Bring the catalog for root (and optionally its subtree) up to date.
+
+        Returns the number of directories that had to be re-listed. Listing
+        happens without holding the catalog lock, so queries keep being
+        answered from the previous listing; results are stored in batches.
+        """
+        root = os.path.abspath(root)
+        relisted = 0
+        pending = [root]
+        listings = []
+        listed_files = 0
+        while pending:
+            folder = pending.pop()
+            listing = self._list_if_changed(folder, stats)
+            if listing is None:
+                if recursive:
+                    with self._lock:
+                        pending.extend(self._child_dirs(folder))
+                continue
+            relisted += 1
+            listings.append(listing)
+            listed_files += len(listing[3])
+            if recursive:
+                pending.extend(listing[4])
+            if listed_files >= STORE_BATCH_FILES:
+                self._store_all(listings)
+                listings, listed_files = [], 0
+        self._store_all(listings)
+        return relisted
+
+    def _list_if_changed(self, folder, stats):
+        """(folder, mtime_ns, listed_ns, records, subdirs) if folder changed, else None"""
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._forget(folder)
+                self.conn.commit()
+            return None
+
+        with self._lock:
+            if self._is_fresh(folder, mtime_ns):
+                return None
+
+        listed_ns = time.time_ns()
+        subdirs = []
+        records = scan_folder(folder, stats, subdirs)
+        return folder, mtime_ns, listed_ns, records, subdirs
+
+    def _store_all(self, listings):
+        if not listings:
+            return
+        with self._lock:
+            try:
+                for listing in listings:
+                    self._store(*listing)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            for folder, mtime_ns, listed_ns, _, _ in listings:
+                self._stored(folder, mtime_ns, listed_ns)
+
+    def _stored(self, folder, mtime_ns, listed_ns):
+        # Racy listings are reused for RACY_REUSE_NS from the moment they are committed
+        if listed_ns - mtime_ns <= RACY_WINDOW_NS:
+            self._stored_at[folder] = time.monotonic()
+        else:
+            self._stored_at.pop(folder, None)
+
+    def _is_fresh(self, folder, mtime_ns):
+        row = self.conn.execute(
+            'SELECT mtime_ns, listed_ns FROM dirs WHERE path = ?', (folder,)
+        ).fetchone()
+        if not row or row[0] != mtime_ns:
+            return False
+        if row[1] - mtime_ns > RACY_WINDOW_NS:
+            return True
+        stored = self._stored_at.get(folder)
+        return stored is not None and time.monotonic() - stored < RACY_REUSE_NS / 1e9
+
+    def state(self, root):
+        """'fresh', 'stale' (listed, but changed since) or 'missing' (never listed)"""
+        root = os.path.abspath(root)
+        try:
+            mtime_ns = os.stat(root).st_mtime_ns
+        except OSError:
+            return 'missing'
+        with self._lock:
+            if self._is_fresh(root, mtime_ns):
+                return 'fresh'
+            row = self.conn.execute('SELECT listed_ns FROM dirs WHERE path = ?', (root,)).fetchone()
+        return 'stale' if row and row[0] else 'missing'
+
+    def _store(self, folder, mtime_ns, listed_ns, records, subdirs):
+        """Replace the catalogued listing of folder (caller commits, then calls _stored)"""
+        self.conn.execute('DELETE FROM files WHERE dir = ?', (folder,))
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO files (dir, name, size, mtime_ns, inode, type) VALUES (?, ?, ?, ?, ?, ?)',
+            [(folder, r.name, r.size, r.mtime_ns, r.inode, r.type) for r in records]
+        )
+        self.conn.execute(
+            'INSERT OR REPLACE INTO dirs (path, parent, mtime_ns, listed_ns) VALUES (?, ?, ?, ?)',
+            (folder, os.path.dirname(folder), mtime_ns, listed_ns)
+        )
+
+        # Drop subdirectories that disappeared, register new ones (unlisted)
+        known = set(self._child_dirs(folder))
+        current = set(subdirs)
+        for gone in known - current:
+            self._forget(gone)
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO dirs (path, parent, mtime_ns, listed_ns) VALUES (?, ?, NULL, 0)',
+            [(d, folder) for d in current - known]
+        )
+
+    def _child_dirs(self, folder):
+        rows = self.conn.execute('SELECT path FROM dirs WHERE parent = ?', (folder,)).fetchall()
+        return [r[0] for r in rows]
+
+    def _forget(self, folder):
+        """Remove a directory and everything catalogued below it"""
+        prefix = os.path.join(folder, '')
+        self.conn.execute(
+            'DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?', (folder, len(prefix), prefix)
+        )
+        self.conn.execute(
+            'DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?', (folder, len(prefix), prefix)
+        )
+
+    # -- queries -------------------------------------------------------------
+
+    def files(self, root, recursive=False):
+        """Return catalogued FileRecords for root (without refreshing)"""
+        root = os.path.abspath(root)
+        with self._lock:
+            if recursive:
+                prefix = os.path.join(root, '')
+                rows = self.conn.execute(
+                    'SELECT dir, name, size, mtime_ns, inode, type FROM files '
+                    'WHERE dir = ? OR substr(dir, 1, ?) = ? ORDER BY dir, name',
+                    (root, len(prefix), prefix)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT dir, name, size, mtime_ns, inode, type FROM files WHERE dir = ? ORDER BY name',
+                    (root,)
+                ).fetchall()
+        return self._records(rows)
+
+    def _records(self, rows):
+        return [
+            FileRecord(name, ftype, size, mtime_ns / 1e9, mtime_ns, inode, os.path.join(folder, name))
+            for folder, name, size, mtime_ns, inode, ftype in rows
+        ]
+
+    def iter_files(self, root, batch_size=2000):
+        """Yield root's catalogued FileRecords in name-ordered batches"""
+        cursor = None
+        while True:
+            records, cursor = self.page(root, limit=batch_size, cursor=cursor)
+            if records:
+                yield records
+            if cursor is None:
+                return
+
+    def child_dirs(self, root):
+        """Catalogued immediate subdirectories of root"""
+        with self._lock:
+            return self._child_dirs(os.path.abspath(root))
+
+    def dir_mtime(self, root):
+        """mtime_ns root had when it was last listed (None if never listed)"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT mtime_ns FROM dirs WHERE path = ?', (os.path.abspath(root),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def count(self, root):
+        """Number of catalogued files directly inside root"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT COUNT(*) FROM files WHERE dir = ?', (os.path.abspath(root),)
+            ).fetchone()
+        return row[0]
+
+    def page(self, root, sort='name', descending=False, limit=200, cursor=None, offset=0):
+        """Return (records, next_cursor) for one page of root's files.
+
+        Paging is keyset based: cursor is the (sort value, name) pair of the
+        last row of the previous page, so each page is an index range scan
+        regardless of how deep into the folder it is. offset is only applied
+        when no cursor is given.
+        """
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Unknown sort key: {sort}")
+        order = 'DESC' if descending else 'ASC'
+        sql = 'SELECT dir, name, size, mtime_ns, inode, type FROM files WHERE dir = ?'
+        params = [os.path.abspath(root)]
+        if cursor:
+            sql += f" AND ({column}, name) {'<' if descending else '>'} (?, ?)"
+            params.extend(cursor[:2])
+        sql += f' ORDER BY {column} {order}, name {order} LIMIT ?'
+        params.append(limit)
+        if offset and not cursor:
+            sql += ' OFFSET ?'
+            params.append(offset)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        records = self._records(rows)
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = records[-1]
+            next_cursor = [getattr(last, 'mtime_ns' if sort == 'mtime' else sort), last.name]
+        return records, next_cursor
+
+    def page_from_disk(self, root, sort='name', descending=False, limit=200):
+        """First page of root listed straight from disk; returns (records, next_cursor, total).
+
+        The catalog is neither read nor written. In name order only the files
+        on the page are stat'ed; size and mtime order need every file's stat.
+        """
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Unknown sort key: {sort}")
+        root = os.path.abspath(root)
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        if sort == 'name':
+            names = []
+            with os.scandir(root) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_dir():
+                            names.append(entry.name)
+                    except OSError:
+                        continue
+            records = []
+            for name in pick(limit, names):
+                path = os.path.join(root, name)
+                try:
+                    records.append(stat_record(path))
+                except OSError:
+                    # Broken symlink or vanished file - still report it, as iter_folder does
+                    records.append(FileRecord(name, file_type(name), 0, 0.0, 0, 0, path))
+            total = len(names)
+        else:
+            everything = scan_folder(root)
+            records = pick(limit, everything, key=lambda r: (getattr(r, column), r.name))
+            total = len(everything)
+
+        next_cursor = None
+        if records and total > limit:
+            last = records[-1]
+            next_cursor = [getattr(last, column), last.name]
+        return records, next_cursor, total
+
+    def iter_batches(self, root, batch_size=500, stats=None):
+        """Yield root's FileRecords in batches as soon as they are available.
+
+        A fresh directory is served from the catalog; a changed one is streamed
+        straight from scandir and written to the catalog once fully listed.
+        """
+        root = os.path.abspath(root)
+        try:
+            mtime_ns = os.stat(root).st_mtime_ns
+        except OSError:
+            return
+
+        with self._lock:
+            fresh = self._is_fresh(root, mtime_ns)
+        if fresh:
+            yield from self.iter_files(root, batch_size)
+            return
+
+        listed_ns = time.time_ns()
+        subdirs = []
+        records = []
+        batch = []
+        for record in iter_folder(root, stats, subdirs):
+            records.append(record)
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+        with self._lock:
+            try:
+                self._store(root, mtime_ns, listed_ns, records, subdirs)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self._stored(root, mtime_ns, listed_ns)
+
+    def scan(self, root, recursive=False, stats=None):
+        """Refresh root and return its FileRecords from the catalog"""
+        self.refresh(root, recursive, stats)
+        return self.files(root, recursive)
+
+
+if __name__ == "__main__":
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else '.'
+    catalog = FileCatalog(':memory:')
+    for attempt in ('cold', 'warm'):
+        counters = ScanStats()
+        start = time.perf_counter()
+        records = catalog.scan(folder, recursive=True, stats=counters)
+        elapsed = time.perf_counter() - start
+        print(f"{attempt}: {len(records)} files in {elapsed * 1000:.1f} ms {counters.as_dict()}")
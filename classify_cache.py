@@ -0,0 +1,180 @@
+"""
+RishFlow v2.0 - Classification Cache
+SQLite cache of AISmartSorter results keyed by (dev, inode, size, mtime_ns)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+# Bytes hashed from each end of a file for the moved-file lookup
+HASH_EDGE_BYTES = 64 * 1024
+
+
+def content_hash(path, size):
+    """Cheap content fingerprint: size plus the first and last 64 KB"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode('ascii'))
+    with open(path, 'rb') as f:
+        h.update(f.read(HASH_EDGE_BYTES))
+        if size > 2 * HASH_EDGE_BYTES:
+            f.seek(-HASH_EDGE_BYTES, os.SEEK_END)
+            h.update(f.read(HASH_EDGE_BYTES))
+    return h.hexdigest()
+
+
+class ClassificationCache:
+    """Persistent map from a file's identity to its AI Smart category.
+
+    A hit needs the same (dev, inode, size, mtime_ns), the same file name
+    (categories may embed it) and the same classifier key; the key combines
+    the classifier version and the AI Smart rules fingerprint, so editing
+    either invalidates every older entry. With hash_moved (off by default:
+    it reads up to 128 KB per new file), a miss falls back to a content hash
+    so files copied across devices (new inode, same bytes) are still
+    recognised; lookup() hands that digest back so put() does not read the
+    file again.
+
+    Recency is tracked in memory and written back in batches; once the table
+    holds more than max_entries rows the least recently used are evicted.
+    """
+
+    def __init__(self, classifier_key, db_path="rishflow_classify.db", max_entries=200000,
+                 hash_moved=False, flush_every=500):
+        self.classifier_key = classifier_key
+        self.max_entries = max_entries
+        self.hash_moved = hash_moved
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # (dev, inode) -> tick
+        self._writes = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS classified (
+                dev INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER,
+                mtime_ns INTEGER,
+                name TEXT,
+                classifier TEXT,
+                category TEXT,
+                content_hash TEXT,
+                last_used INTEGER,
+                PRIMARY KEY (dev, inode)
+            );
+            CREATE INDEX IF NOT EXISTS idx_classified_hash ON classified(content_hash);
+            CREATE INDEX IF NOT EXISTS idx_classified_used ON classified(last_used);
+        ''')
+        # Results of older classifiers or rules can never hit again
+        self.conn.execute('DELETE FROM classified WHERE classifier != ?', (classifier_key,))
+        self.conn.commit()
+        row = self.conn.execute('SELECT MAX(last_used) FROM classified').fetchone()
+        self._tick = (row[0] or 0) + 1
+
+    def get(self, path, st=None):
+        """Cached category for path, or None. st may be a ready os.stat result."""
+        return self.lookup(path, st)[0]
+
+    def lookup(self, path, st=None):
+        """(cached category or None, content digest or None); pass the digest on to put"""
+        st = st or os.stat(path)
+        name = os.path.basename(path)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT size, mtime_ns, name, classifier, category FROM classified WHERE dev = ? AND inode = ?',
+                (st.st_dev, st.st_ino)
+            ).fetchone()
+            if row and row[:4] == (st.st_size, st.st_mtime_ns, name, self.classifier_key):
+                self._touch_locked(st.st_dev, st.st_ino)
+                self.hits += 1
+                return row[4], None
+
+        digest = None
+        if self.hash_moved and st.st_size:
+            try:
+                digest = content_hash(path, st.st_size)
+            except OSError:
+                digest = None
+            if digest:
+                with self._lock:
+                    row = self.conn.execute(
+                        'SELECT category FROM classified WHERE content_hash = ? AND name = ? AND classifier = ? LIMIT 1',
+                        (digest, name, self.classifier_key)
+                    ).fetchone()
+                if row:
+                    # Same bytes under a new identity: remember it under this one too
+                    self._store(st, name, row[0], digest)
+                    with self._lock:
+                        self.hits += 1
+                    return row[0], digest
+        with self._lock:
+            self.misses += 1
+        return None, digest
+
+    def put(self, path, category, st=None, digest=None):
+        """Store a category; digest is the one lookup returned, if any"""
+        st = st or os.stat(path)
+        if digest is None and self.hash_moved and st.st_size:
+            try:
+                digest = content_hash(path, st.st_size)
+            except OSError:
+                pass
+        self._store(st, os.path.basename(path), category, digest)
+
+    def _store(self, st, name, category, digest):
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO classified VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, name,
+                 self.classifier_key, category, digest, self._tick)
+            )
+            self._tick += 1
+            self._writes += 1
+            if self._writes >= self.flush_every:
+                self._flush_locked()
+
+    def _touch_locked(self, dev, inode):
+        self._touched[(dev, inode)] = self._tick
+        self._tick += 1
+        if len(self._touched) >= self.flush_every:
+            self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._touched:
+            self.conn.executemany(
+                'UPDATE classified SET last_used = ? WHERE dev = ? AND inode = ?',
+                [(tick, dev, inode) for (dev, inode), tick in self._touched.items()]
+            )
+            self._touched = {}
+        count = self.conn.execute('SELECT COUNT(*) FROM classified').fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                'DELETE FROM classified WHERE rowid IN '
+                '(SELECT rowid FROM classified ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,)
+            )
+        self.conn.commit()
+        self._writes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else None
+            }
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
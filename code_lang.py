@@ -0,0 +1,197 @@
+"""
+RishFlow v2.0 - Code Language Detection
+Extension and shebang lookups first, then one combined keyword regex over a byte budget
+"""
+
+import os
+import re
+
+from rules import extension
+
+# Extensions that name their language outright (.h is C or C++, so it is scanned)
+EXTENSION_LANGUAGES = {
+    '.py': 'python', '.pyw': 'python',
+    '.js': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript',
+    '.cpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp', '.hpp': 'cpp',
+    '.c': 'c',
+    '.java': 'java',
+    '.html': 'html', '.htm': 'html',
+    '.css': 'css', '.scss': 'css',
+    # Data formats: nothing to detect
+    '.json': 'json', '.xml': 'xml'
+}
+
+# Interpreter named on a "#!" line -> language
+SHEBANG_LANGUAGES = {
+    'python': 'python', 'node': 'javascript', 'sh': 'shell', 'bash': 'shell',
+    'zsh': 'shell', 'ruby': 'ruby', 'perl': 'perl'
+}
+
+# Weighted keywords per language; earlier languages win ties
+KEYWORDS = {
+    'python': {'def ': 2, 'import ': 1, 'elif ': 3, 'self.': 2, 'print(': 1, '__name__': 3},
+    'javascript': {'function': 1, 'const ': 1, 'let ': 1, '=>': 1, 'console.log': 3, 'require(': 2},
+    'cpp': {'#include': 1, 'std::': 3, 'cout': 2, 'cin': 1, 'int main': 1, 'template<': 3},
+    'c': {'printf(': 2, 'malloc(': 2, '#include <stdio.h>': 3},
+    'java': {'public class': 3, 'System.out': 3, 'import java.': 3, 'import ': 1},
+    'html': {'<html': 3, '<div': 2, '<script': 2, '<!DOCTYPE': 3},
+    'css': {':hover': 2, 'display:': 2, 'background': 1, 'margin:': 1}
+}
+
+# Languages whose keywords match in any case (<!DOCTYPE html>, <HTML>, <Div>)
+CASE_INSENSITIVE = frozenset({'html'})
+
+BYTE_BUDGET = 2048  # bytes read from the start of a file that needs a keyword scan
+
+_SHEBANG = re.compile(rb'#!\s*(\S+)(?:[ \t]+(\S+))?')
+
+
+def is_script(path):
+    """True for an extension-less file whose first line is a "#!" (reads two bytes)"""
+    if extension(os.path.basename(str(path))):
+        return False
+    try:
+        with open(path, 'rb') as f:
+            return f.read(2) == b'#!'
+    except OSError:
+        return False
+
+
+def _trie_pattern(words, folded=()):
+    """One regex for all words, alternatives merged on shared prefixes.
+
+    "import " and "import java." share one branch whose optional tail is
+    greedy, so the longest keyword at a position wins. There are no capture
+    groups (nor top-level branches); they would stop the regex engine from
+    skipping ahead on the first character. Letters of the lower-case words
+    in folded match either case, as [hH].
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        fold = word in folded
+        for ch in word:
+            node = node.setdefault((ch, fold and ch.isalpha()), {})
+        node[('', False)] = {}  # a word ends here
+
+    def char(key):
+        ch, fold = key
+        return f'[{ch}{ch.upper()}]' if fold else re.escape(ch)
+
+    def build(node):
+        ends = ('', False) in node
+        alternatives = [char(key) + build(child) for key, child in sorted(node.items()) if key[0]]
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and not ends:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')' + ('?' if ends else '')
+
+    return build(trie)
+
+
+class LanguageDetector:
+    """Programming language of a source file, cheapest evidence first.
+
+    1. extension: a table lookup, the file is not opened;
+    2. shebang: the interpreter on a "#!" first line;
+    3. keywords: all keywords of all languages form one compiled regex
+       (a prefix trie, see _trie_pattern), so the buffer is scanned once;
+       each distinct keyword found adds its weight to its language.
+
+    Only the first byte_budget bytes are read. stats counts how files were
+    decided (extension, shebang, keywords, unknown). Keywords of the
+    case_insensitive languages match in any case.
+    """
+
+    def __init__(self, extensions=EXTENSION_LANGUAGES, keywords=KEYWORDS, byte_budget=BYTE_BUDGET,
+                 case_insensitive=CASE_INSENSITIVE):
+        self.extensions = extensions
+        self.byte_budget = byte_budget
+        self.stats = {'extension': 0, 'shebang': 0, 'keywords': 0, 'unknown': 0}
+        # Keyword -> [(language, weight)]; a keyword listed by several
+        # languages is one alternative scoring for all of them
+        self._scores = {}
+        self._folded = {}  # lower-cased case-insensitive keyword -> keyword
+        for lang, words in keywords.items():
+            for word, weight in words.items():
+                self._scores.setdefault(word, []).append((lang, weight))
+                if lang in case_insensitive:
+                    self._folded[word.lower()] = word
+        words = [word for word in self._scores if word not in self._folded.values()]
+        self._pattern = re.compile(_trie_pattern(words + list(self._folded), self._folded))
+        self._order = {lang: i for i, lang in enumerate(keywords)}
+
+    def detect_path(self, path):
+        """Language of a file ('unknown' if nothing matched)"""
+        lang = self.extensions.get(os.path.splitext(str(path))[1].lower())
+        if lang is not None:
+            self.stats['extension'] += 1
+            return lang
+        with open(path, 'rb') as f:
+            head = f.read(self.byte_budget)
+        if head.startswith(b'#!'):
+            lang = self.from_shebang(head)
+            if lang is not None:
+                self.stats['shebang'] += 1
+                return lang
+        return self.detect_text(head.decode('utf-8', errors='ignore'))
+
+    def from_shebang(self, head):
+        match = _SHEBANG.match(head)
+        if not match:
+            return None
+        interpreter = os.path.basename(match.group(1)).decode('ascii', errors='ignore')
+        if interpreter == 'env' and match.group(2):
+            interpreter = match.group(2).decode('ascii', errors='ignore')
+        return SHEBANG_LANGUAGES.get(interpreter.rstrip('0123456789.'))
+
+    def detect_text(self, content):
+        """Language of a source text by weighted keyword scan"""
+        seen = set()
+        scores = {}
+        for match in self._pattern.finditer(content, 0, self.byte_budget):
+            word = match.group()
+            if word not in self._scores:
+                word = self._folded[word.lower()]
+            if word in seen:
+                continue
+            seen.add(word)
+            for lang, weight in self._scores[word]:
+                scores[lang] = scores.get(lang, 0) + weight
+            if len(seen) == len(self._scores):
+                break  # every keyword found; nothing left to learn
+        if not scores:
+            self.stats['unknown'] += 1
+            return 'unknown'
+        self.stats['keywords'] += 1
+        return max(scores, key=lambda lang: (scores[lang], -self._order[lang]))
+
+
+if __name__ == "__main__":
+    # Benchmark over a source checkout: python code_lang.py <folder>
+    import sys
+    import time
+    from collections import Counter
+    from rules import get_ruleset
+
+    # The files AISmartSorter hands to classify_code, extension-less scripts included
+    code_exts = get_ruleset('AI Smart').extensions(handler='code')
+    folder = sys.argv[1] if len(sys.argv) > 1 else '.'
+    paths = [path for root, dirs, names in os.walk(folder) if '.git' not in root.split(os.sep)
+             for path in (os.path.join(root, name) for name in names)
+             if extension(os.path.basename(path)) in code_exts or is_script(path)]
+
+    for label, detector in (('full', LanguageDetector()), ('keywords only', LanguageDetector(extensions={}))):
+        languages = Counter()
+        start = time.perf_counter()
+        for path in paths:
+            try:
+                languages[detector.detect_path(path)] += 1
+            except OSError:
+                continue
+        elapsed = time.perf_counter() - start
+        print(f"{label:14s} {len(paths)} files in {elapsed:.3f}s "
+              f"({elapsed / max(len(paths), 1) * 1e6:.1f} us/file) {detector.stats}")
+        print(f"{'':14s} {dict(languages.most_common(8))}")
@@ -1,8 +1,11 @@
 import hashlib
 import os
-from pathlib import Path
-from PIL import Image
-import imagehash
+from lazy_imports import lazy
+from walker import parallel_walk
+
+# Only perceptual hashing needs these; loaded on first use
+Image = lazy('PIL.Image')
+imagehash = lazy('imagehash')
 
 class DuplicateFinder:
     def __init__(self):
@@ -26,17 +29,29 @@ class DuplicateFinder:
         except:
             return None
             
-    def find_duplicates(self, folder_path):
+    def find_duplicates(self, folder_path, progress=None, should_stop=None):
+        """Groups of identical files, largest first.
+
+        progress(record) is called after each file is hashed; when
+        should_stop() turns true the scan ends early with what it has.
+        """
         duplicates = []
         
-        for file_path in Path(folder_path).rglob('*'):
-            if file_path.is_file():
-                file_hash = self.hash_file(str(file_path))
-                
-                if file_hash in self.hashes:
-                    self.hashes[file_hash].append(str(file_path))
-                else:
-                    self.hashes[file_hash] = [str(file_path)]
+        # Hashing starts as soon as the first directory has been listed
+        for record in parallel_walk(folder_path):
+            if should_stop is not None and should_stop():
+                break
+            try:
+                file_hash = self.hash_file(record.path)
+            except OSError:
+                continue  # vanished or unreadable
+            if progress is not None:
+                progress(record)
+            
+            if file_hash in self.hashes:
+                self.hashes[file_hash].append(record.path)
+            else:
+                self.hashes[file_hash] = [record.path]
         
         # Find groups with more than 1 file
         for hash_val, files in self.hashes.items():
@@ -0,0 +1,152 @@
+"""
+RishFlow v2.0 - Folder Statistics
+Streaming aggregator (bounded top-K, histograms, size buckets) and cached subtree rollups
+"""
+
+import bisect
+import heapq
+import itertools
+import os
+import threading
+
+# Size bucket upper bounds (same thresholds as the "Size Category" sort mode)
+SIZE_BUCKET_LIMITS = [1024 * 1024, 100 * 1024 * 1024, 1024 * 1024 * 1024]
+SIZE_BUCKET_LABELS = ['< 1MB', '1-100MB', '100MB-1GB', '> 1GB']
+
+
+class FolderStats:
+    """Streaming statistics over FileRecords.
+
+    Memory does not grow with the number of files: the largest files are kept
+    in a min-heap of top_k entries and everything else is a counter.
+    """
+
+    def __init__(self, top_k=10):
+        self.top_k = top_k
+        self.total_files = 0
+        self.total_size = 0
+        self.count_by_type = {}
+        self.size_by_type = {}
+        self.count_by_ext = {}
+        self.size_by_ext = {}
+        self.size_buckets = [0] * len(SIZE_BUCKET_LABELS)
+        self._largest = []  # min-heap of (size, name, path)
+
+    def add(self, record):
+        size = record.size
+        self.total_files += 1
+        self.total_size += size
+
+        ftype = record.type
+        self.count_by_type[ftype] = self.count_by_type.get(ftype, 0) + 1
+        self.size_by_type[ftype] = self.size_by_type.get(ftype, 0) + size
+
+        ext = os.path.splitext(record.name)[1].lower() or '(none)'
+        self.count_by_ext[ext] = self.count_by_ext.get(ext, 0) + 1
+        self.size_by_ext[ext] = self.size_by_ext.get(ext, 0) + size
+
+        self.size_buckets[bisect.bisect_right(SIZE_BUCKET_LIMITS, size)] += 1
+        self._push_largest((size, record.name, record.path))
+
+    def add_all(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other):
+        """Fold another FolderStats (e.g. a subdirectory rollup) into this one"""
+        self.total_files += other.total_files
+        self.total_size += other.total_size
+        for mine, theirs in ((self.count_by_type, other.count_by_type),
+                             (self.size_by_type, other.size_by_type),
+                             (self.count_by_ext, other.count_by_ext),
+                             (self.size_by_ext, other.size_by_ext)):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        for i, count in enumerate(other.size_buckets):
+            self.size_buckets[i] += count
+        for item in other._largest:
+            self._push_largest(item)
+        return self
+
+    def copy(self):
+        clone = FolderStats(self.top_k)
+        return clone.merge(self)
+
+    def _push_largest(self, item):
+        if len(self._largest) < self.top_k:
+            heapq.heappush(self._largest, item)
+        elif item > self._largest[0]:
+            heapq.heapreplace(self._largest, item)
+
+    def largest(self):
+        """Top-K files as (size, name, path), biggest first"""
+        return sorted(self._largest, reverse=True)
+
+    def as_dict(self):
+        return {
+            'total_files': self.total_files,
+            'total_size': self.total_size,
+            'count_by_type': dict(self.count_by_type),
+            'size_by_type': dict(self.size_by_type),
+            'count_by_ext': dict(self.count_by_ext),
+            'size_by_ext': dict(self.size_by_ext),
+            'size_buckets': dict(zip(SIZE_BUCKET_LABELS, self.size_buckets)),
+            'largest_files': [{'name': n, 'size': s, 'path': p} for s, n, p in self.largest()]
+        }
+
+
+class SubtreeRollups:
+    """Recursive per-directory rollups computed from a FileCatalog.
+
+    Each directory's own stats are cached against its mtime_ns, and each
+    rollup against its own mtime plus the rollup tokens of its children. When
+    one subtree changes only that directory's own stats are recomputed; its
+    ancestors just re-merge cached child rollups, and sibling subtrees are
+    reused as-is.
+    """
+
+    def __init__(self, catalog, top_k=10):
+        self.catalog = catalog
+        self.top_k = top_k
+        self._own = {}      # dir -> (mtime_ns, FolderStats)
+        self._rollup = {}   # dir -> (key, token, FolderStats)
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def rollup(self, folder):
+        """Return the FolderStats for folder's whole subtree (catalog must be refreshed)"""
+        with self._lock:
+            return self._rollup_dir(os.path.abspath(folder))[1]
+
+    def children(self, folder):
+        """Return [(path, FolderStats)] for each immediate subdirectory's rollup"""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            return [(child, self._rollup_dir(child)[1]) for child in self.catalog.child_dirs(folder)]
+
+    def _rollup_dir(self, folder):
+        mtime_ns = self.catalog.dir_mtime(folder)
+        child_results = [self._rollup_dir(child) for child in self.catalog.child_dirs(folder)]
+        key = (mtime_ns, tuple(token for token, _ in child_results))
+
+        cached = self._rollup.get(folder)
+        if cached and cached[0] == key:
+            return cached[1], cached[2]
+
+        total = self._own_stats(folder, mtime_ns).copy()
+        for _, child_stats in child_results:
+            total.merge(child_stats)
+        token = next(self._tokens)
+        self._rollup[folder] = (key, token, total)
+        return token, total
+
+    def _own_stats(self, folder, mtime_ns):
+        cached = self._own.get(folder)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        stats = FolderStats(self.top_k)
+        for batch in self.catalog.iter_files(folder):
+            stats.add_all(batch)
+        self._own[folder] = (mtime_ns, stats)
+        return stats
@@ -0,0 +1,355 @@
+"""
+RishFlow v2.0 - Background Jobs
+Job handles, a prioritized job scheduler and rate-limited progress reporting
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Job states
+QUEUED = 'queued'
+PLANNING = 'planning'
+RUNNING = 'running'
+COMPLETE = 'complete'
+CANCELLED = 'cancelled'
+FAILED = 'error'
+
+FINISHED_STATES = (COMPLETE, CANCELLED, FAILED)
+
+
+class JobConflict(ValueError):
+    """A job would touch folders another queued or running job writes to"""
+
+
+class Job:
+    """Progress and cancellation handle for one background operation.
+
+    Workers call advance() per finished item and poll cancelled; readers take
+    snapshot(), which derives files/sec, bytes/sec and ETA from the counters.
+    Counter updates are plain attribute writes under a lock, cheap enough to
+    do once per file.
+    """
+
+    def __init__(self, kind, priority=0, reads=(), writes=(), parent=None, **meta):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.meta = meta
+        self.priority = priority
+        self.parent = parent  # session job this one works for (never conflicts with it)
+        self.reads = tuple(_norm(p) for p in reads)
+        self.writes = tuple(_norm(p) for p in writes)
+        self.result = None
+        self.usage = {}
+        self.state = QUEUED
+        self.message = ""
+        self.total_files = 0
+        self.total_bytes = 0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.failed = 0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self.version = 0  # bumped on every change so publishers can skip idle jobs
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._touch()
+
+    def start(self, state=RUNNING):
+        with self._lock:
+            if self.started is None:
+                self.started = time.monotonic()
+            self.state = state
+            self.version += 1
+
+    def set_totals(self, files, total_bytes):
+        with self._lock:
+            self.total_files = files
+            self.total_bytes = total_bytes
+            self.version += 1
+
+    def advance(self, files=1, size=0, failed=0):
+        with self._lock:
+            self.done_files += files
+            self.done_bytes += size
+            self.failed += failed
+            self.version += 1
+
+    def finish(self, state=COMPLETE, message=""):
+        with self._lock:
+            self.state = state
+            self.message = message
+            self.finished = time.monotonic()
+            self.version += 1
+
+    def set_usage(self, usage):
+        with self._lock:
+            self.usage = usage
+            self.version += 1
+
+    def _touch(self):
+        with self._lock:
+            self.version += 1
+
+    def snapshot(self):
+        with self._lock:
+            end = self.finished or time.monotonic()
+            elapsed = end - self.started if self.started else 0.0
+            files_per_s = self.done_files / elapsed if elapsed > 0 else 0.0
+            bytes_per_s = self.done_bytes / elapsed if elapsed > 0 else 0.0
+            eta = None
+            if self.state == RUNNING and self.total_bytes and bytes_per_s > 0:
+                eta = max(self.total_bytes - self.done_bytes, 0) / bytes_per_s
+            elif self.state == RUNNING and self.total_files and files_per_s > 0:
+                eta = max(self.total_files - self.done_files - self.failed, 0) / files_per_s
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'priority': self.priority,
+                'state': self.state,
+                'cancel_requested': self._cancel.is_set(),
+                'message': self.message,
+                'total_files': self.total_files,
+                'total_bytes': self.total_bytes,
+                'done_files': self.done_files,
+                'done_bytes': self.done_bytes,
+                'failed': self.failed,
+                'percent': round(100.0 * (self.done_files + self.failed) / self.total_files, 1)
+                           if self.total_files else 0.0,
+                'elapsed': round(elapsed, 2),
+                'files_per_s': round(files_per_s, 1),
+                'bytes_per_s': round(bytes_per_s),
+                'eta': round(eta, 1) if eta is not None else None,
+                'usage': dict(self.usage),
+                **self.meta
+            }
+
+    def conflicts_with(self, other):
+        """True if either job writes somewhere the other one reads or writes"""
+        if self.parent is other or other.parent is self:
+            return False
+        return (any(_overlaps(w, p) for w in self.writes for p in other.reads + other.writes)
+                or any(_overlaps(w, p) for w in other.writes for p in self.reads))
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _overlaps(a, b):
+    """Same folder, or one inside the other"""
+    if a == b:
+        return True
+    a, b = a.rstrip(os.sep) + os.sep, b.rstrip(os.sep) + os.sep
+    return a.startswith(b) or b.startswith(a)
+
+
+class JobManager:
+    """Registry of jobs plus one publisher thread for progress pushes.
+
+    Every interval seconds the publisher collects the snapshots of jobs that
+    changed since the last push and hands them to publish(list_of_snapshots)
+    in a single call, so a 100k-file run produces a few UI updates per second
+    no matter how fast files move. The thread only runs while some job is
+    unfinished. Finished jobs are kept (up to keep_finished) for status queries.
+    """
+
+    def __init__(self, publish, interval=0.25, keep_finished=50):
+        self.publish = publish
+        self.interval = interval
+        self.keep_finished = keep_finished
+        self._jobs = {}
+        self._published = {}  # job id -> version last pushed
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def create(self, kind, **meta):
+        job = Job(kind, **meta)
+        with self._lock:
+            self._register_locked(job)
+        return job
+
+    def _register_locked(self, job):
+        self._jobs[job.id] = job
+        self._prune_locked()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name='rishflow-jobs')
+            self._thread.start()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.state in FINISHED_STATES:
+            return False
+        job.cancel()
+        return True
+
+    def finish(self, job, state=COMPLETE, message=""):
+        """Finish a job and push its final state without waiting for the next tick"""
+        job.finish(state, message)
+        self._wake.set()
+
+    def _prune_locked(self):
+        finished = [j for j in self._jobs.values() if j.state in FINISHED_STATES]
+        if len(finished) <= self.keep_finished:
+            return
+        finished.sort(key=lambda j: j.created)
+        for job in finished[:len(finished) - self.keep_finished]:
+            del self._jobs[job.id]
+            self._published.pop(job.id, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                changed = [j for j in self._jobs.values() if self._published.get(j.id) != j.version]
+                for job in changed:
+                    self._published[job.id] = job.version
+                active = any(j.state not in FINISHED_STATES for j in self._jobs.values())
+            if changed:
+                try:
+                    self.publish([job.snapshot() for job in changed])
+                except Exception as e:
+                    print(f"[jobs] Publish error: {e}")
+            if not active:
+                with self._lock:
+                    # A job created or updated while we were publishing keeps the thread alive
+                    if all(j.state in FINISHED_STATES and self._published.get(j.id) == j.version
+                           for j in self._jobs.values()):
+                        self._thread = None
+                        return
+
+
+class JobScheduler(JobManager):
+    """JobManager that also runs the jobs: a priority queue and a worker budget.
+
+    submit() queues target(job) and returns the Job at once; at most
+    max_workers jobs run at the same time, higher priority first and FIFO
+    within a priority. A job declares the folders it reads and writes; one
+    that would write where a queued or running job reads or writes (or read
+    where one writes) is rejected with JobConflict, since organizing a folder
+    while it is being deduplicated or organized elsewhere would race.
+
+    hold() registers a long-running session (watch mode) that runs on its own
+    thread: it takes no worker but blocks conflicting submissions until it is
+    finished, and jobs submitted with parent=session run beside it.
+
+    Each job's usage records queue wait, wall time, CPU time of the thread
+    that ran it and, where the platform reports it, that thread's block I/O.
+    """
+
+    def __init__(self, publish, max_workers=3, interval=0.25, keep_finished=50):
+        super().__init__(publish, interval, keep_finished)
+        self.max_workers = max(1, max_workers)
+        self._queue = []  # heap of (-priority, seq, job, target)
+        self._seq = itertools.count()
+        self._workers = 0
+        self._submitted = {}  # job id -> monotonic submit time
+
+    def submit(self, kind, target, priority=0, reads=(), writes=(), parent=None, **meta):
+        job = Job(kind, priority=priority, reads=reads, writes=writes, parent=parent, **meta)
+        with self._lock:
+            self._check_conflicts_locked(job)
+            self._register_locked(job)
+            self._submitted[job.id] = time.monotonic()
+            heapq.heappush(self._queue, (-priority, next(self._seq), job, target))
+            if self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._work, daemon=True, name='rishflow-job-worker').start()
+        return job
+
+    def hold(self, kind, reads=(), writes=(), **meta):
+        """Running job for a session that works outside the queue; end it with finish()"""
+        job = Job(kind, reads=reads, writes=writes, **meta)
+        with self._lock:
+            self._check_conflicts_locked(job)
+            job.start()
+            self._register_locked(job)
+        return job
+
+    def _check_conflicts_locked(self, job):
+        for other in self._jobs.values():
+            if other.state not in FINISHED_STATES and job.conflicts_with(other):
+                raise JobConflict(f"Conflicts with {other.kind} job {other.id} on overlapping folders")
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.state in FINISHED_STATES:
+            return False
+        job.cancel()
+        if job.state == QUEUED:
+            # Never started: drop it now (the worker skips cancelled entries)
+            self.finish(job, CANCELLED)
+        return True
+
+    def running(self):
+        with self._lock:
+            return [j for j in self._jobs.values() if j.state not in FINISHED_STATES + (QUEUED,)]
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while self._queue and self._queue[0][2].state != QUEUED:
+                    heapq.heappop(self._queue)  # cancelled while queued
+                if not self._queue:
+                    self._workers -= 1
+                    return
+                _, _, job, target = heapq.heappop(self._queue)
+                queued_for = time.monotonic() - self._submitted.pop(job.id, time.monotonic())
+            self._execute(job, target, queued_for)
+
+    def _execute(self, job, target, queued_for):
+        job.start()
+        wall, cpu, io = time.monotonic(), time.thread_time(), _thread_io()
+        try:
+            job.result = target(job)
+            state, message = (CANCELLED if job.cancelled else COMPLETE), ""
+        except Exception as e:
+            state, message = FAILED, str(e)
+        usage = {
+            'queued_s': round(queued_for, 3),
+            'wall_s': round(time.monotonic() - wall, 3),
+            'cpu_s': round(time.thread_time() - cpu, 3)
+        }
+        if io is not None:
+            end_io = _thread_io()
+            usage['read_blocks'] = end_io[0] - io[0]
+            usage['write_blocks'] = end_io[1] - io[1]
+        job.set_usage(usage)
+        if job.state not in FINISHED_STATES:
+            # Targets may finish the job themselves (e.g. as cancelled)
+            job.finish(state, message)
+        self._wake.set()
+
+
+def _thread_io():
+    """(blocks read, blocks written) by the calling thread, or None"""
+    if resource is None or not hasattr(resource, 'RUSAGE_THREAD'):
+        return None
+    usage = resource.getrusage(resource.RUSAGE_THREAD)
+    return usage.ru_inblock, usage.ru_oublock
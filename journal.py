@@ -0,0 +1,324 @@
+"""
+RishFlow v2.0 - Operation Journal
+Append-only JSONL log of organize runs and their moves, with grouped fsyncs
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Never compact a journal smaller than this
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+class _RunIndex:
+    """In-memory state of one run: its summary and where its records are"""
+
+    __slots__ = ('summary', 'segments', 'plan_bytes', 'move_bytes')
+
+    def __init__(self, summary):
+        self.summary = summary
+        self.segments = []   # [start, end) byte ranges holding only this run's records
+        self.plan_bytes = 0
+        self.move_bytes = 0
+
+
+class OperationJournal:
+    """Append-only record of every move, grouped into runs.
+
+    Recording a move appends one line (O(1)); the file is flushed and fsynced
+    once every fsync_every records or fsync_interval seconds, whichever comes
+    first, and always when a run ends. A crash loses at most the last unsynced
+    group; a torn final line is ignored when the journal is read back.
+
+    Record types (field "t"): "run" starts a run, "plan" checkpoints a chunk
+    of its move plan, "planned" marks the plan complete, "mv" is one move,
+    "end" closes a run, "resume" reopens it and "revert" marks it reverted.
+
+    The file is parsed once, at open, into a per-run index (summary plus the
+    byte ranges of its records) that every append keeps current, so run
+    queries never re-read the file and plan/operations read only that run's
+    bytes. Records nothing will read again (the plan of a completed run, the
+    moves of a reverted one) are compacted away when a run closes once they
+    outweigh the rest of the file.
+    """
+
+    def __init__(self, path="rishflow_journal.jsonl", fsync_every=256, fsync_interval=1.0,
+                 compact_min_bytes=COMPACT_MIN_BYTES):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_min_bytes = compact_min_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        self._terminate_torn_line()
+        self._load_index()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _terminate_torn_line(self):
+        """After a crash mid-write, start new records on a fresh line"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write(b'\n')
+                    self._file.flush()
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """Build the run index with one pass over the file"""
+        self._runs = {}
+        self._dead_bytes = 0
+        self._size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                start = self._size
+                self._size += len(line)
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                self._index_record(rec, start, self._size)
+
+    def _index_record(self, rec, start, end):
+        run_id = rec.get('run')
+        kind = rec.get('t')
+        if kind == 'run':
+            entry = _RunIndex({
+                'run_id': run_id, 'source': rec.get('src'), 'dest': rec.get('dst'),
+                'mode': rec.get('mode'), 'started': rec.get('ts'),
+                # Totals carried over from records dropped by compaction
+                'moves': rec.get('moves', 0), 'planned': rec.get('planned', 0),
+                'plan_complete': rec.get('plan_complete', False),
+                'status': 'running', 'reverted': False
+            })
+            self._runs[run_id] = entry
+        else:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                return
+        run = entry.summary
+        if entry.segments and entry.segments[-1][1] == start:
+            entry.segments[-1][1] = end
+        else:
+            entry.segments.append([start, end])
+
+        if kind == 'mv':
+            run['moves'] += 1
+            entry.move_bytes += end - start
+            if run['reverted']:
+                self._dead_bytes += end - start
+        elif kind == 'plan':
+            run['planned'] += len(rec.get('moves', ()))
+            entry.plan_bytes += end - start
+        elif kind == 'planned':
+            run['plan_complete'] = True
+            entry.plan_bytes += end - start
+        elif kind == 'end':
+            run['status'] = rec.get('status', 'complete')
+            if run['status'] == 'complete' and not run['reverted']:
+                self._dead_bytes += entry.plan_bytes
+        elif kind == 'resume':
+            run['status'] = 'running'
+        elif kind == 'revert' and not run['reverted']:
+            run['reverted'] = True
+            self._dead_bytes += entry.move_bytes
+            if run['status'] != 'complete':
+                self._dead_bytes += entry.plan_bytes
+
+    # -- writing -------------------------------------------------------------
+
+    def begin_run(self, source, dest, mode):
+        run_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        self._append({'t': 'run', 'run': run_id, 'src': source, 'dst': dest,
+                      'mode': mode, 'ts': time.time()}, sync=True)
+        return run_id
+
+    def record_move(self, run_id, dest, orig):
+        """Journal that orig was moved to dest as part of run_id"""
+        self._append({'t': 'mv', 'run': run_id, 'to': dest, 'from': orig})
+
+    def record_plan(self, run_id, moves):
+        """Checkpoint a chunk of planned moves (sequences of plain values)"""
+        self._append({'t': 'plan', 'run': run_id, 'moves': [list(m) for m in moves]})
+
+    def plan_complete(self, run_id, count):
+        self._append({'t': 'planned', 'run': run_id, 'count': count}, sync=True)
+
+    def resume_run(self, run_id):
+        self._append({'t': 'resume', 'run': run_id, 'ts': time.time()}, sync=True)
+
+    def end_run(self, run_id, status='complete'):
+        self._append({'t': 'end', 'run': run_id, 'status': status, 'ts': time.time()},
+                     sync=True, compact=True)
+
+    def mark_reverted(self, run_id):
+        self._append({'t': 'revert', 'run': run_id, 'ts': time.time()}, sync=True, compact=True)
+
+    def flush(self):
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+
+    def _append(self, record, sync=False, compact=False):
+        data = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self._file.write(data)
+            start = self._size
+            self._size += len(data)
+            self._index_record(record, start, self._size)
+            self._unsynced += 1
+            if (sync or self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+            if (compact and self._size >= self.compact_min_bytes
+                    and self._dead_bytes * 2 >= self._size):
+                self._compact_locked()
+
+    def _sync_locked(self):
+        if self._file.closed:
+            return
+        self._file.flush()
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _compact_locked(self):
+        """Rewrite the journal without records that will not be read again.
+
+        Completed runs lose their plan, reverted runs their plan and moves;
+        their "run" record keeps the totals so summaries do not change. The
+        new file replaces the old one atomically, then the index is rebuilt.
+        """
+        dropped = {}
+        for run_id, entry in self._runs.items():
+            run = entry.summary
+            kinds = set()
+            if run['reverted']:
+                kinds = {'plan', 'planned', 'mv'}
+            elif run['status'] == 'complete':
+                kinds = {'plan', 'planned'}
+            if kinds:
+                dropped[run_id] = kinds
+        self._file.flush()
+        tmp_path = self.path + '.compact'
+        try:
+            with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for line in src:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    kinds = dropped.get(rec.get('run'))
+                    if kinds:
+                        if rec.get('t') in kinds:
+                            continue
+                        if rec.get('t') == 'run':
+                            run = self._runs[rec['run']].summary
+                            rec.update(planned=run['planned'], plan_complete=run['plan_complete'])
+                            if 'mv' in kinds:
+                                rec['moves'] = run['moves']
+                            line = (json.dumps(rec, ensure_ascii=False) + '\n').encode('utf-8')
+                    dst.write(line)
+                dst.flush()
+                os.fsync(dst.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[Journal] compaction error: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        finally:
+            if self._file.closed:
+                self._file = open(self.path, 'ab')
+        self._load_index()
+
+    # -- reading -------------------------------------------------------------
+
+    def _run_records(self, run_id, kinds):
+        """Records of one run whose type is in kinds, read from its byte ranges only"""
+        with self._lock:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                return []
+            self._file.flush()  # our own unflushed appends; no fsync needed to read them
+            records = []
+            with open(self.path, 'rb') as f:
+                for start, end in entry.segments:
+                    f.seek(start)
+                    for line in f.read(end - start).splitlines():
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            continue
+                        if rec.get('t') in kinds:
+                            records.append(rec)
+            return records
+
+    def runs(self):
+        """All runs, oldest first, with move counts and status"""
+        with self._lock:
+            return [dict(entry.summary) for entry in self._runs.values()]
+
+    def run(self, run_id):
+        with self._lock:
+            entry = self._runs.get(run_id)
+            return dict(entry.summary) if entry is not None else None
+
+    def plan(self, run_id):
+        """Checkpointed plan of a run: (list of move value lists, complete)"""
+        moves = []
+        complete = False
+        for rec in self._run_records(run_id, ('plan', 'planned')):
+            if rec['t'] == 'plan':
+                moves.extend(rec.get('moves', ()))
+            else:
+                complete = True
+        return moves, complete
+
+    def operations(self, run_id):
+        """(dest, orig) pairs of a run, in the order they were recorded"""
+        return [(rec['to'], rec['from']) for rec in self._run_records(run_id, ('mv',))]
+
+    def last_run(self):
+        """Most recent run that has moves and has not been reverted"""
+        with self._lock:
+            for entry in reversed(self._runs.values()):
+                if entry.summary['moves'] and not entry.summary['reverted']:
+                    return dict(entry.summary)
+        return None
+
+    def import_legacy(self, legacy_path):
+        """Turn an old last_ops.json ([[dest, orig], ...]) into a journal run"""
+        if not os.path.exists(legacy_path):
+            return None
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                ops = json.load(f)
+        except Exception:
+            return None
+        run_id = None
+        if ops:
+            run_id = self.begin_run('', '', 'legacy')
+            for dest, orig in ops:
+                self.record_move(run_id, dest, orig)
+            self.end_run(run_id)
+        os.replace(legacy_path, legacy_path + '.migrated')
+        return run_id
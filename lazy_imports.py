@@ -0,0 +1,117 @@
+"""
+RishFlow v2.0 - Lazy Imports
+Heavy dependencies (OpenCV, NumPy, PIL, Tesseract, pypdf) load on first use, with a startup report
+"""
+
+import importlib
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Module-level cost the dashboard may spend importing before the window opens
+STARTUP_BUDGET_S = 0.5
+
+_loads = []  # (module, seconds, monotonic time of first use)
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is first used.
+
+    `cv2 = lazy('cv2')` at module level costs nothing; the real import runs
+    (once, timed) when code first touches cv2.something.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _loads.append((self._name, time.perf_counter() - start, time.monotonic()))
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy(name):
+    return LazyModule(name)
+
+
+def available(name):
+    """True if the module is installed, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_loads():
+    """Heavy modules loaded so far and how long each import took"""
+    with _lock:
+        return [{'module': name, 'seconds': round(seconds, 3)} for name, seconds, _ in _loads]
+
+
+def import_report(module='app', top=15):
+    """Cumulative import time of module and its heaviest direct imports (python -X importtime)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name[1:].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2  # nesting is shown by indentation
+        rows.append((int(cumulative), depth, name.strip()))
+    total, children = None, []
+    for us, depth, name in rows:
+        # A module is printed after everything it imported
+        if depth == 0:
+            if name == module:
+                total = us
+                break
+            children = []
+        elif depth == 1:
+            children.append((us, name))
+    heaviest = sorted(children, reverse=True)[:top]
+    return {
+        'module': module,
+        'total_s': round(total / 1e6, 3) if total is not None else None,
+        'budget_s': STARTUP_BUDGET_S,
+        'within_budget': total is not None and total / 1e6 <= STARTUP_BUDGET_S,
+        'heaviest': [{'module': name, 'seconds': round(us / 1e6, 3)} for us, name in heaviest],
+        'error': proc.stderr.strip().splitlines()[-1] if proc.returncode else None
+    }
+
+
+if __name__ == "__main__":
+    # Startup budget check: python lazy_imports.py [module]
+    report = import_report(sys.argv[1] if len(sys.argv) > 1 else 'app')
+    if report['error']:
+        print(f"Import failed: {report['error']}")
+    else:
+        status = 'OK' if report['within_budget'] else 'OVER BUDGET'
+        print(f"import {report['module']}: {report['total_s']:.3f}s (budget {report['budget_s']}s) {status}")
+        for row in report['heaviest']:
+            print(f"  {row['seconds']:7.3f}s  {row['module']}")
@@ -0,0 +1,278 @@
+"""
+RishFlow v2.0 - File Mover
+Rename fast path for same-device moves, kernel-side copy for cross-device ones
+"""
+
+import errno
+import os
+import shutil
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MoveResult = namedtuple('MoveResult', ['source', 'dest', 'bytes', 'seconds', 'method'])
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Concurrent moves allowed per device class
+ROTATIONAL_LIMIT = 1      # spinning disks: parallel seeks only thrash
+SOLID_STATE_LIMIT = 8     # SSD/NVMe, and network/virtual filesystems (latency bound)
+DEFAULT_DEVICE_LIMIT = 4  # device class unknown (non-Linux)
+
+# errnos meaning "this copy primitive is not usable for this pair of files"
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+
+class FileMover:
+    """Move files with the cheapest mechanism available.
+
+    Same-device moves are a single atomic os.rename. Cross-device moves copy
+    the data inside the kernel with copy_file_range (or sendfile), falling back
+    to a buffered user-space copy, then copy metadata and unlink the source.
+    Per-file results carry the bytes moved and elapsed time so callers can
+    report throughput; running totals are kept per method.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self.totals = {}  # method -> [files, bytes, seconds]
+
+    def move(self, src, dst, same_device=None):
+        """Move src to dst; returns a MoveResult.
+
+        same_device may be passed when it is already known (e.g. from a move
+        plan); when None a rename is attempted and EXDEV triggers the copy.
+        """
+        start = time.perf_counter()
+        if same_device is not False:
+            try:
+                os.rename(src, dst)
+                return self._finish(src, dst, 0, start, 'rename')
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+
+        if os.path.islink(src) or os.path.isdir(src):
+            # Nothing to stream: let shutil recreate the link / tree
+            shutil.move(src, dst)
+            return self._finish(src, dst, 0, start, 'shutil')
+
+        copied, method = self._copy_data(src, dst)
+        try:
+            shutil.copystat(src, dst)
+        except OSError:
+            pass
+        os.unlink(src)
+        return self._finish(src, dst, copied, start, method)
+
+    def _copy_data(self, src, dst):
+        """Copy file contents; returns (bytes, method). Removes dst on failure.
+
+        Raises FileExistsError, leaving the existing file alone, if dst exists.
+        """
+        with open(src, 'rb') as fsrc:
+            # Exclusive create: never truncate a file that appeared at dst
+            # since its name was claimed (it is not ours to remove either)
+            fdst = open(dst, 'xb')
+            try:
+                with fdst:
+                    infd, outfd = fsrc.fileno(), fdst.fileno()
+                    size = os.fstat(infd).st_size
+                    for method, copier in (('copy_file_range', self._copy_file_range),
+                                           ('sendfile', self._sendfile)):
+                        try:
+                            return copier(infd, outfd, size), method
+                        except OSError as e:
+                            if e.errno not in _UNSUPPORTED:
+                                raise
+                            # Nothing written yet in that case; try the next primitive
+                            os.lseek(infd, 0, os.SEEK_SET)
+                            os.lseek(outfd, 0, os.SEEK_SET)
+                            os.ftruncate(outfd, 0)
+                    return self._buffered(fsrc, fdst), 'buffered'
+            except BaseException:
+                try:
+                    os.unlink(dst)
+                except OSError:
+                    pass
+                raise
+
+    def _copy_file_range(self, infd, outfd, size):
+        if not hasattr(os, 'copy_file_range'):
+            raise OSError(errno.ENOSYS, "copy_file_range unavailable")
+        copied = 0
+        while True:
+            n = os.copy_file_range(infd, outfd, self.chunk_size)
+            if n == 0:
+                break
+            copied += n
+        if copied == 0 and size > 0:
+            # Some filesystems (e.g. procfs-like or older kernels across fs) report 0
+            raise OSError(errno.EINVAL, "copy_file_range copied nothing")
+        return copied
+
+    def _sendfile(self, infd, outfd, size):
+        if not hasattr(os, 'sendfile'):
+            raise OSError(errno.ENOSYS, "sendfile unavailable")
+        copied = 0
+        while True:
+            n = os.sendfile(outfd, infd, None, self.chunk_size)
+            if n == 0:
+                break
+            copied += n
+        if copied == 0 and size > 0:
+            raise OSError(errno.EINVAL, "sendfile copied nothing")
+        return copied
+
+    def _buffered(self, fsrc, fdst):
+        copied = 0
+        buf = bytearray(min(self.chunk_size, 1024 * 1024))
+        view = memoryview(buf)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(view[:n])
+            copied += n
+        return copied
+
+    def _finish(self, src, dst, copied, start, method):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            entry = self.totals.setdefault(method, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += copied
+            entry[2] += elapsed
+        return MoveResult(src, dst, copied, elapsed, method)
+
+    def summary(self):
+        """Per-method totals with throughput in MB/s (copies only)"""
+        with self._lock:
+            report = {}
+            for method, (files, copied, seconds) in self.totals.items():
+                report[method] = {
+                    'files': files,
+                    'bytes': copied,
+                    'seconds': round(seconds, 3),
+                    'mb_per_s': round(copied / seconds / (1024 * 1024), 1) if copied and seconds else None
+                }
+            return report
+
+
+def throughput_mb_s(result):
+    """MB/s for a single MoveResult (None for renames)"""
+    if not result.bytes or not result.seconds:
+        return None
+    return result.bytes / result.seconds / (1024 * 1024)
+
+
+def device_concurrency(dev):
+    """Default number of concurrent moves for a st_dev value"""
+    if not hasattr(os, 'major'):
+        return DEFAULT_DEVICE_LIMIT
+    major, minor = os.major(dev), os.minor(dev)
+    if major == 0:
+        # Anonymous device: NFS, SMB, FUSE, tmpfs - latency rather than seek bound
+        return SOLID_STATE_LIMIT
+    base = f'/sys/dev/block/{major}:{minor}'
+    # Partitions keep the queue attributes on their parent disk
+    for path in (base + '/queue/rotational', base + '/../queue/rotational'):
+        try:
+            with open(path) as f:
+                return ROTATIONAL_LIMIT if f.read().strip() == '1' else SOLID_STATE_LIMIT
+        except OSError:
+            continue
+    return DEFAULT_DEVICE_LIMIT
+
+
+class ParallelMoveExecutor:
+    """Run FileMover moves on a thread pool with per-device concurrency caps.
+
+    A move occupies a slot on every device it touches (source and, when
+    different, destination); it only starts when all of them have a free slot
+    and the global worker budget allows it. Moves waiting on a busy device do
+    not block moves to other devices. submit() returns a Future resolving to
+    the MoveResult, so callers keep their own bookkeeping (undo lists, logs)
+    single-threaded by consuming results as they complete.
+    """
+
+    def __init__(self, mover=None, max_workers=8, device_limits=None):
+        self.mover = mover or FileMover()
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = self.max_workers * 4
+        self.device_limits = dict(device_limits or {})
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='rishflow-move')
+        self._lock = threading.Lock()
+        self._queue = deque()   # (devices, src, dst, same_device, future)
+        self._active = {}       # dev -> running moves
+        self._running = 0
+        self._dev_cache = {}    # directory -> st_dev
+
+    def submit(self, src, dst, same_device=None):
+        future = Future()
+        devices = self._devices(src, dst)
+        with self._lock:
+            self._queue.append((devices, src, dst, same_device, future))
+            self._dispatch_locked()
+        return future
+
+    def limit_for(self, dev):
+        if dev not in self.device_limits:
+            self.device_limits[dev] = device_concurrency(dev)
+        return self.device_limits[dev]
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _devices(self, src, dst):
+        devs = {self._dir_dev(os.path.dirname(src)), self._dir_dev(os.path.dirname(dst))}
+        devs.discard(None)
+        return tuple(sorted(devs))
+
+    def _dir_dev(self, folder):
+        with self._lock:
+            if folder in self._dev_cache:
+                return self._dev_cache[folder]
+        try:
+            dev = os.stat(folder).st_dev
+        except OSError:
+            dev = None
+        with self._lock:
+            self._dev_cache[folder] = dev
+        return dev
+
+    def _dispatch_locked(self):
+        """Start queued moves whose devices all have a free slot"""
+        if self._running >= self.max_workers or not self._queue:
+            return
+        waiting = deque()
+        while self._queue and self._running < self.max_workers:
+            item = self._queue.popleft()
+            devices = item[0]
+            if all(self._active.get(d, 0) < self.limit_for(d) for d in devices):
+                for d in devices:
+                    self._active[d] = self._active.get(d, 0) + 1
+                self._running += 1
+                self._pool.submit(self._run, item)
+            else:
+                waiting.append(item)
+        # Keep FIFO order for everything that could not start yet
+        waiting.extend(self._queue)
+        self._queue = waiting
+
+    def _run(self, item):
+        devices, src, dst, same_device, future = item
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.mover.move(src, dst, same_device))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                for d in devices:
+                    self._active[d] -= 1
+                self._running -= 1
+                self._dispatch_locked()
@@ -0,0 +1,190 @@
+"""
+RishFlow v2.0 - OCR Engine
+Long-lived Tesseract engines fed in-memory image buffers, one result per OCR pass
+"""
+
+import queue
+import threading
+
+from lazy_imports import available, lazy
+
+pytesseract = lazy('pytesseract')
+tesserocr = lazy('tesserocr')  # in-process libtesseract bindings
+
+# Layout levels in Tesseract's TSV output
+LEVEL_WORD = 5
+
+
+class OCRTimeout(Exception):
+    """Tesseract did not finish within the requested time"""
+
+
+class OCRResult:
+    """Words and confidences from one OCR pass over an image.
+
+    Built from Tesseract's TSV output, which both backends produce, so every
+    heuristic reads the same numbers: text for keyword and date matching,
+    density for "how much of this image is text".
+    """
+
+    def __init__(self, words, confidences, boxes):
+        self.words = words              # [(line key, word)] in reading order
+        self.confidences = confidences  # per word, -1 for none
+        self.boxes = boxes              # layout rows (page, block, paragraph, line, word)
+
+    @classmethod
+    def from_tsv(cls, tsv):
+        words, confidences, boxes = [], [], 0
+        for row in tsv.splitlines():
+            cols = row.split('\t')
+            if len(cols) < 12 or not cols[0].isdigit():
+                continue  # header or malformed row
+            boxes += 1
+            if int(cols[0]) != LEVEL_WORD:
+                continue
+            try:
+                conf = int(float(cols[10]))
+            except ValueError:
+                conf = -1
+            words.append(((cols[1], cols[2], cols[3], cols[4]), cols[11]))
+            confidences.append(conf)
+        return cls(words, confidences, boxes)
+
+    @property
+    def text(self):
+        lines, line, current = [], [], None
+        for key, word in self.words:
+            if key != current and line:
+                lines.append(' '.join(line))
+                line = []
+            current = key
+            if word:
+                line.append(word)
+        if line:
+            lines.append(' '.join(line))
+        return '\n'.join(lines)
+
+    def density(self, min_conf=30):
+        """Confident words per layout box (the old image_to_data heuristic)"""
+        confident = sum(1 for conf in self.confidences if conf > min_conf)
+        return confident / max(self.boxes, 1)
+
+
+class TesserocrBackend:
+    """Pool of PyTessBaseAPI handles; language data is loaded once per handle"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', size=1):
+        self.lang = lang
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self, timeout=0):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return tesserocr.PyTessBaseAPI(lang=self.lang)
+        try:
+            return self._idle.get(timeout=timeout or None)
+        except queue.Empty:
+            raise OCRTimeout()
+
+    def recognize(self, gray, timeout=0):
+        """OCRResult for a grayscale array.
+
+        The timeout covers waiting for a free handle and recognition itself:
+        Recognize(ms) sets a deadline on Tesseract's progress monitor, which
+        cancels the pass and returns False once it expires.
+        """
+        api = self._acquire(timeout)
+        try:
+            height, width = gray.shape[:2]
+            api.SetImageBytes(gray.tobytes(), width, height, 1, gray.strides[0])
+            if timeout:
+                if not api.Recognize(max(1, int(timeout * 1000))):
+                    raise OCRTimeout()
+            else:
+                api.Recognize()
+            return OCRResult.from_tsv(api.GetTSVText(0))
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().End()
+            except queue.Empty:
+                break
+
+
+class PytesseractBackend:
+    """One tesseract process per call (pytesseract); the buffer goes in as an array"""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+
+    def recognize(self, gray, timeout=0):
+        try:
+            tsv = pytesseract.image_to_data(gray, lang=self.lang, timeout=timeout)
+        except RuntimeError as e:
+            if 'timeout' in str(e).lower():
+                raise OCRTimeout()
+            raise
+        return OCRResult.from_tsv(tsv)
+
+    def close(self):
+        pass
+
+
+class OCREngine:
+    """OCR entry point shared by the classifiers of one process.
+
+    Uses in-process tesserocr handles when the package is installed (a pool
+    of pool_size, so threads in the desktop app can share it), otherwise
+    pytesseract. Images are uint8 grayscale numpy arrays; color arrays are
+    converted by the caller.
+    """
+
+    def __init__(self, lang='eng', pool_size=1):
+        if available('tesserocr'):
+            self.backend = TesserocrBackend(lang, pool_size)
+        else:
+            self.backend = PytesseractBackend(lang)
+        self.calls = 0
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def recognize(self, gray, timeout=0):
+        """OCRResult for a grayscale array; timeout in seconds (0 = none)"""
+        self.calls += 1
+        if not gray.flags['C_CONTIGUOUS']:
+            gray = gray.copy()
+        return self.backend.recognize(gray, timeout)
+
+    def close(self):
+        self.backend.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine (one per ClassificationPipeline worker)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = OCREngine()
+        return _engine
@@ -0,0 +1,217 @@
+"""
+RishFlow v2.0 - Move Planner
+Two-phase organize: build a compact move plan first, then execute it in bulk
+"""
+
+import os
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, wait
+
+from mover import FileMover
+
+PlannedMove = namedtuple('PlannedMove', ['source', 'dest_dir', 'name', 'size', 'same_device'])
+
+# Windows and macOS volumes are case-insensitive by default: photo.JPG and
+# photo.jpg name the same file there, so names are compared case-folded
+if sys.platform in ('win32', 'darwin'):
+    def _fold(name):
+        return name.casefold()
+else:
+    def _fold(name):
+        return name
+
+
+class MovePlan:
+    """Ordered list of PlannedMoves plus totals that are known before anything moves"""
+
+    def __init__(self, dest_root, moves=None):
+        self.dest_root = dest_root
+        self.moves = moves or []
+
+    def __len__(self):
+        return len(self.moves)
+
+    def dest_dirs(self):
+        """Distinct destination directories, parents before children"""
+        return sorted({m.dest_dir for m in self.moves})
+
+    def ordered(self):
+        """Moves grouped by destination directory, then by source directory.
+
+        Consecutive moves touch the same pair of directories, which keeps
+        directory blocks and dentries hot (and NAS round trips coalesced).
+        """
+        return sorted(self.moves, key=lambda m: (m.dest_dir, os.path.dirname(m.source), m.name))
+
+    def totals(self):
+        total_bytes = 0
+        cross_device_files = 0
+        cross_device_bytes = 0
+        for m in self.moves:
+            total_bytes += m.size
+            if not m.same_device:
+                cross_device_files += 1
+                cross_device_bytes += m.size
+        return {
+            'files': len(self.moves),
+            'bytes': total_bytes,
+            'folders': len(self.dest_dirs()),
+            'cross_device_files': cross_device_files,
+            'cross_device_bytes': cross_device_bytes
+        }
+
+    def folder_counts(self):
+        """Files per destination folder (relative to the destination root)"""
+        counts = {}
+        for m in self.moves:
+            folder = os.path.relpath(m.dest_dir, self.dest_root)
+            counts[folder] = counts.get(folder, 0) + 1
+        return counts
+
+
+class NameIndex:
+    """Hands out unique file names per destination directory.
+
+    Each directory is listed once, the first time a name is claimed in it;
+    after that every claim is a set lookup. Taken names get a numbered
+    suffix (photo.jpg -> photo_1.jpg, photo_2.jpg, ...). The next number to
+    try is remembered per name, so a thousand IMG_0001.jpg files cost one
+    probe each instead of re-checking _1, _2, ... from the start.
+
+    On case-insensitive platforms (Windows, macOS) names differing only in
+    case count as taken; the name handed out keeps its original case.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}     # directory -> set of folded names present or claimed
+        self._counters = {}  # (directory, folded stem, folded ext) -> next suffix to try
+
+    def claim(self, directory, name):
+        """Reserve and return a name in directory that nothing else uses"""
+        with self._lock:
+            names = self._listing(directory)
+            if _fold(name) not in names:
+                names.add(_fold(name))
+                return name
+            stem, ext = os.path.splitext(name)
+            key = (os.path.normcase(directory), _fold(stem), _fold(ext))
+            counter = self._counters.get(key, 1)
+            candidate = f"{stem}_{counter}{ext}"
+            while _fold(candidate) in names:
+                counter += 1
+                candidate = f"{stem}_{counter}{ext}"
+            names.add(_fold(candidate))
+            self._counters[key] = counter + 1
+            return candidate
+
+    def reserve(self, directory, name):
+        """Mark a name as taken without renaming (e.g. moves of a resumed plan)"""
+        with self._lock:
+            self._listing(directory).add(_fold(name))
+
+    def _listing(self, directory):
+        key = os.path.normcase(directory)
+        names = self._names.get(key)
+        if names is None:
+            try:
+                with os.scandir(directory) as it:
+                    names = {_fold(entry.name) for entry in it}
+            except OSError:
+                names = set()  # not created yet
+            self._names[key] = names
+        return names
+
+
+def build_plan(records, dest_root, folder_for, names=None):
+    """Plan moving FileRecords into dest_root/<folder_for(record)>/<name>.
+
+    Only the source directories and the destination root are stat'ed (once
+    each) to decide whether a move stays on the same device. With a
+    NameIndex, colliding names get a numbered suffix instead of overwriting.
+    """
+    dest_root = os.path.abspath(dest_root)
+    try:
+        dest_dev = os.stat(dest_root).st_dev
+    except OSError:
+        dest_dev = None
+
+    dev_cache = {}
+    moves = []
+    for record in records:
+        src_dir = os.path.dirname(record.path)
+        if src_dir not in dev_cache:
+            try:
+                dev_cache[src_dir] = os.stat(src_dir).st_dev
+            except OSError:
+                dev_cache[src_dir] = None
+        same_device = dest_dev is not None and dev_cache[src_dir] == dest_dev
+        dest_dir = os.path.join(dest_root, folder_for(record))
+        name = names.claim(dest_dir, record.name) if names is not None else record.name
+        moves.append(PlannedMove(record.path, dest_dir, name, record.size, same_device))
+    return MovePlan(dest_root, moves)
+
+
+def execute_plan(plan, mover=None, on_moved=None, on_failed=None, executor=None, should_stop=None):
+    """Execute a MovePlan with a FileMover; returns (moved, failed).
+
+    Every destination directory is created exactly once up front and the
+    plan's same-device flag picks rename vs. copy without probing. With a
+    ParallelMoveExecutor, moves run concurrently (bounded in flight) while the
+    callbacks still run on the calling thread. on_moved is called as
+    on_moved(move, dest_file, result) and on_failed as on_failed(move, error).
+    When should_stop() turns true no further moves start; moves already in
+    flight still finish and are reported.
+    """
+    mover = mover or (executor.mover if executor else FileMover())
+    broken_dirs = {}
+    for dest_dir in plan.dest_dirs():
+        try:
+            os.makedirs(dest_dir, exist_ok=True)
+        except OSError as e:
+            broken_dirs[dest_dir] = e
+
+    counts = [0, 0]  # moved, failed
+    pending = {}
+
+    def report(move, dest_file, result, error):
+        if error is not None:
+            counts[1] += 1
+            if on_failed:
+                on_failed(move, error)
+        else:
+            counts[0] += 1
+            if on_moved:
+                on_moved(move, dest_file, result)
+
+    def drain(return_when):
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            move, dest_file = pending.pop(future)
+            error = future.exception()
+            report(move, dest_file, None if error else future.result(), error)
+
+    for move in plan.ordered():
+        if should_stop is not None and should_stop():
+            break
+        dest_file = os.path.join(move.dest_dir, move.name)
+        if move.dest_dir in broken_dirs:
+            report(move, dest_file, None, broken_dirs[move.dest_dir])
+            continue
+        if executor is None:
+            try:
+                result = mover.move(move.source, dest_file, move.same_device)
+            except Exception as e:
+                report(move, dest_file, None, e)
+                continue
+            report(move, dest_file, result, None)
+        else:
+            pending[executor.submit(move.source, dest_file, move.same_device)] = (move, dest_file)
+            if len(pending) >= executor.max_in_flight:
+                drain(FIRST_COMPLETED)
+
+    if pending:
+        drain(ALL_COMPLETED)
+    return counts[0], counts[1]
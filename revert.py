@@ -0,0 +1,127 @@
+"""
+RishFlow v2.0 - Bulk Revert
+Move organized files back in parallel, then remove emptied folders in one deepest-first pass
+"""
+
+import errno
+import os
+
+from planner import MovePlan, PlannedMove, execute_plan
+
+# Files the OS drops into folders; they do not keep a folder from being "empty"
+IGNORED_FILES = {'.DS_Store', 'Thumbs.db', 'desktop.ini'}
+
+
+class RevertResult:
+    def __init__(self):
+        self.restored = 0
+        self.missing = 0
+        self.failed = 0
+        self.removed_dirs = []
+
+    def as_dict(self):
+        return {
+            'restored': self.restored,
+            'missing': self.missing,
+            'failed': self.failed,
+            'removed_folders': len(self.removed_dirs)
+        }
+
+
+def revert_moves(ops, root=None, mover=None, executor=None, on_restored=None, on_failed=None):
+    """Undo (dest, orig) moves; returns a RevertResult.
+
+    The reverse moves become a MovePlan, so every original folder is created
+    once, moves are grouped by directory pair and run on the executor (rename
+    when source and target share a device). Files no longer at dest are
+    counted as missing without a separate exists() check. Afterwards the
+    folders the files came out of, and their parents below root, are removed
+    if empty (see remove_empty_dirs). on_restored(dest, orig) and
+    on_failed(dest, orig, error) run on the calling thread.
+    """
+    result = RevertResult()
+    moves = [PlannedMove(dest, os.path.dirname(orig), os.path.basename(orig), 0, None)
+             for dest, orig in ops]
+    emptied = set()
+
+    def moved(move, orig, _):
+        result.restored += 1
+        emptied.add(os.path.dirname(move.source))
+        if on_restored:
+            on_restored(move.source, orig)
+
+    def failed(move, error):
+        if isinstance(error, FileNotFoundError) and not os.path.lexists(move.source):
+            result.missing += 1
+            return
+        result.failed += 1
+        if on_failed:
+            on_failed(move.source, os.path.join(move.dest_dir, move.name), error)
+
+    execute_plan(MovePlan(root or '', moves), mover, on_moved=moved, on_failed=failed, executor=executor)
+    result.removed_dirs = remove_empty_dirs(emptied, root)
+    return result
+
+
+def remove_empty_dirs(dirs, root=None):
+    """Remove dirs and their ancestors below root when empty; returns removed paths.
+
+    Each candidate is visited once, deepest first, and rmdir itself is the
+    emptiness test, so a folder is only listed when rmdir reports it is not
+    empty (to check for ignorable OS files). Once a folder stays, none of
+    its ancestors are tried. Without a root only dirs themselves are tried.
+    """
+    root = os.path.abspath(root) if root else None
+    candidates = set()
+    for folder in dirs:
+        folder = os.path.abspath(folder)
+        while folder != root and _below(folder, root):
+            if folder in candidates:
+                break  # this ancestor chain is already in
+            candidates.add(folder)
+            if root is None:
+                break
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                break
+            folder = parent
+
+    removed = []
+    kept = set()
+    for folder in sorted(candidates, key=lambda p: p.count(os.sep), reverse=True):
+        if folder in kept:
+            kept.add(os.path.dirname(folder))
+            continue
+        if _rmdir(folder):
+            removed.append(folder)
+        else:
+            kept.add(os.path.dirname(folder))
+    return removed
+
+
+def _below(folder, root):
+    if root is None:
+        return True
+    return folder.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _rmdir(folder):
+    try:
+        os.rmdir(folder)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+            return False
+    # Not empty: it may only hold OS clutter
+    try:
+        names = os.listdir(folder)
+        if any(name not in IGNORED_FILES for name in names):
+            return False
+        for name in names:
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+        return True
+    except OSError:
+        return False
@@ -6,7 +6,7 @@ Python 3.13 compatible - NO sklearn dependency
 
 import sys
 import os
-import shutil
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
 import sqlite3
@@ -18,14 +18,19 @@ try:
     HAS_WEBENGINE = True
 except ImportError:
     HAS_WEBENGINE = False
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
-
 # Import AI Sorter and Duplicate Finder
-from ai_sorter import AISmartSorter
+from ai_sorter import AISmartSorter, ClassificationPipeline, classifier_key
+from classify_cache import ClassificationCache
 from duplicate_finder import DuplicateFinder
+from scanner import ScanStats
+from walker import parallel_walk
+from mover import FileMover, ParallelMoveExecutor
+from planner import NameIndex
+from revert import revert_moves
+from rules import get_ruleset
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from activity_log import ActivityLogWriter
 
 # App paths
 APP_ICON = "logo.ico"
@@ -56,82 +61,119 @@ class OrganizerThread(QThread):
         self.source_path = source_path
         self.dest_path = dest_path
         self.sort_mode = sort_mode
-        self.ai_sorter = AISmartSorter() if sort_mode == "AI Smart" else None
+        # AI Smart classifies on a process pool (one sorter per worker process);
+        # files classified on an earlier run come from the on-disk cache
+        self.pipeline = None
+        self.classify_cache = None
+        if sort_mode == "AI Smart":
+            self.classify_cache = ClassificationCache(classifier_key())
+            self.pipeline = ClassificationPipeline(cache=self.classify_cache)
+        self.mover = FileMover()
         self.is_running = True
         
     def run(self):
-        source = Path(self.source_path)
-        files = list(source.rglob('*'))
-        image_files = [f for f in files if f.suffix.lower() in AISmartSorter.IMAGE_EXTS]
-        
-        total_files = len([f for f in files if f.is_file()])
-        processed = 0
-        
-        self.log_message.emit(f"Found {total_files} files to organize...")
-        
-        moved_files = []
-        
-        for file_path in files:
-            if not self.is_running:
-                break
-                
-            if file_path.is_file():
+        self.log_message.emit("Scanning source and organizing files...")
+        
+        self.moved = []
+        self.processed = 0
+        self.walk_stats = ScanStats()
+        executor = ParallelMoveExecutor(self.mover)
+        pending = {}
+        names = NameIndex()  # unique destination names, including moves still in flight
+        
+        # Files stream in while the walk is still running; the destination is
+        # pruned in case it lives inside the source folder.
+        records = parallel_walk(self.source_path, exclude=[self.dest_path], stats=self.walk_stats)
+        aborted = False
+        try:
+            for record, category in self._categorized(records):
+                if not self.is_running:
+                    break
+
+                file_path = Path(record.path)
                 try:
-                    category = self.get_category(file_path)
-                    dest_file = Path(self.dest_path) / category / file_path.name
-                    
+                    if isinstance(category, Exception):
+                        raise category
+                    dest_dir = Path(self.dest_path) / category
+
                     # Create destination directory
-                    dest_file.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Skip if already exists (avoid overwrite)
-                    if dest_file.exists():
-                        counter = 1
-                        while (dest_file.parent / f"{file_path.stem}_{counter}{file_path.suffix}").exists():
-                            counter += 1
-                        dest_file = dest_file.parent / f"{file_path.stem}_{counter}{file_path.suffix}"
-                    
-                    shutil.move(str(file_path), str(dest_file))
-                    moved_files.append((str(file_path), str(dest_file)))
-                    
-                    if file_path.suffix.lower() in AISmartSorter.IMAGE_EXTS:
-                        self.preview_image.emit(str(dest_file))
-                    
-                    self.log_message.emit(f"✅ {file_path.name} → {category}/")
-                    
+                    dest_dir.mkdir(parents=True, exist_ok=True)
+
+                    # Avoid overwrite: taken names get a _1, _2, ... suffix
+                    dest_file = dest_dir / names.claim(str(dest_dir), file_path.name)
+
+                    future = executor.submit(str(file_path), str(dest_file))
+                    pending[future] = (file_path, dest_file, category)
                 except Exception as e:
                     self.log_message.emit(f"⚠️ Error moving {file_path.name}: {str(e)}")
-                
-                processed += 1
-                progress = int((processed / total_files) * 100)
-                self.progress_updated.emit(progress)
-        
-        self.log_message.emit(f"🎉 Complete! Moved {len(moved_files)} files.")
-        self.files_moved.emit(moved_files)  # Send moved files to main window for undo
-        
-    def get_category(self, file_path):
-        if self.sort_mode == "AI Smart" and self.ai_sorter:
-            return self.ai_sorter.classify_file(file_path)
-        elif self.sort_mode == "Extension":
-            return self.extension_category(file_path)
-        elif self.sort_mode == "Date":
-            timestamp = datetime.fromtimestamp(file_path.stat().st_mtime)
-            return timestamp.strftime(f"ByDate/%Y/%m/%d")
+                    self._file_done()
+
+                if len(pending) >= executor.max_in_flight:
+                    self._collect(pending, FIRST_COMPLETED)
+        except BrokenProcessPool as e:
+            # Without working classifiers every remaining file would be misfiled
+            aborted = True
+            records.close()
+            self.log_message.emit(f"❌ AI classification workers failed, stopping: {e}")
+        
+        self._collect(pending, ALL_COMPLETED)
+        executor.shutdown()
+        if self.pipeline is not None:
+            self.pipeline.close()
+            stats = self.classify_cache.stats()
+            self.classify_cache.close()
+            self.log_message.emit(f"🧠 Classification cache: {stats['hits']} hits, {stats['misses']} misses")
+        
+        self.progress_updated.emit(100)
+        for method, info in self.mover.summary().items():
+            if info['mb_per_s']:
+                self.log_message.emit(f"📊 {method}: {info['files']} files, {info['bytes'] / (1024 * 1024):.1f} MB at {info['mb_per_s']} MB/s")
+        if aborted:
+            self.log_message.emit(f"⛔ Stopped early. Moved {len(self.moved)} files.")
         else:
-            return "Misc"
+            self.log_message.emit(f"🎉 Complete! Moved {len(self.moved)} files.")
+        self.files_moved.emit(self.moved)  # Send moved files to main window for undo
+    
+    def _collect(self, pending, return_when):
+        """Record finished moves (undo list, log, preview) on this thread"""
+        if not pending:
+            return
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            file_path, dest_file, category = pending.pop(future)
+            error = future.exception()
+            if error is None:
+                self.moved.append((str(file_path), str(dest_file)))
+                if file_path.suffix.lower() in AISmartSorter.IMAGE_EXTS:
+                    self.preview_image.emit(str(dest_file))
+                self.log_message.emit(f"✅ {file_path.name} → {category}/")
+            else:
+                self.log_message.emit(f"⚠️ Error moving {file_path.name}: {str(error)}")
+            self._file_done()
+    
+    def _file_done(self):
+        # Progress against the files discovered so far (the walk may still be running)
+        self.processed += 1
+        progress = int((self.processed / max(self.walk_stats.files, 1)) * 100)
+        self.progress_updated.emit(min(progress, 99))
+        
+    def _categorized(self, records):
+        """(record, category) pairs in walk order; a failed lookup yields the exception"""
+        if self.pipeline is not None:
+            yield from self.pipeline.classify(records, path_of=lambda record: record.path)
+            return
+        for record in records:
+            try:
+                yield record, self.get_category(record)
+            except Exception as e:
+                yield record, e
     
-    def extension_category(self, file_path):
-        ext = file_path.suffix.lower()
-        categories = {
-            '.jpg': 'Images/Photos', '.jpeg': 'Images/Photos', '.png': 'Images/Photos',
-            '.gif': 'Images/Photos', '.bmp': 'Images/Others', '.webp': 'Images/Photos',
-            '.pdf': 'Documents/PDFs', '.docx': 'Documents/Word', '.txt': 'Documents/Text',
-            '.mp4': 'Videos', '.avi': 'Videos', '.mkv': 'Videos', '.mov': 'Videos',
-            '.mp3': 'Audio', '.wav': 'Audio', '.flac': 'Audio',
-            '.zip': 'Archives', '.rar': 'Archives', '.7z': 'Archives',
-            '.py': 'Code/Python', '.js': 'Code/JavaScript', '.cpp': 'Code/C++',
-            '.exe': 'Executables', '.msi': 'Executables'
-        }
-        return categories.get(ext, 'Misc')
+    def get_category(self, record):
+        # "Extension" and "Date" are rule sets in sort_rules.json
+        rules = get_ruleset(self.sort_mode)
+        if rules is None:
+            return "Misc"
+        return rules.classify(record.name, record.size, record.mtime)
 
 class RishFlow(QMainWindow):
     def __init__(self):
@@ -143,6 +185,7 @@ class RishFlow(QMainWindow):
             self.setWindowIcon(QIcon(APP_ICON))
         self.undo_stack = []
         self.organizer_thread = None
+        self.mover = FileMover()
         self.init_database()
         self.init_ui()
         self.apply_theme('dark')
@@ -289,6 +332,11 @@ class RishFlow(QMainWindow):
             )
         ''')
         self.conn.commit()
+        # Log rows are committed in batches off the GUI thread
+        self.activity_log = ActivityLogWriter(
+            self.db_path,
+            "INSERT INTO activity (timestamp, action, source_path, dest_path, file_count) VALUES (?, ?, ?, ?, ?)"
+        )
     
     def browse_source(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Source Folder")
@@ -329,12 +377,8 @@ class RishFlow(QMainWindow):
         self.log_list.addItem(full_message)
         self.log_list.scrollToBottom()
         
-        # Save to database
-        self.conn.execute(
-            "INSERT INTO activity (timestamp, action, source_path, dest_path, file_count) VALUES (?, ?, ?, ?, ?)",
-            (datetime.now().isoformat(), message, self.source_input.text(), self.dest_input.text(), 1)
-        )
-        self.conn.commit()
+        # Save to database (queued; the writer thread commits in batches)
+        self.activity_log.log(datetime.now().isoformat(), message, self.source_input.text(), self.dest_input.text(), 1)
     
     def show_preview(self, image_path):
         pixmap = QPixmap(image_path)
@@ -352,57 +396,35 @@ class RishFlow(QMainWindow):
         self.log_message("🎉 All files organized successfully!")
     
     def on_files_moved(self, moved_files):
-        """Store moved files for undo functionality"""
-        self.undo_stack.append(moved_files)
+        """Store moved files (and the destination root they went under) for undo"""
+        self.undo_stack.append((self.organizer_thread.dest_path, moved_files))
     
     def undo_last(self):
         if not self.undo_stack:
             self.log_message("❌ Nothing to undo!")
             return
         
-        moved_files = self.undo_stack.pop()
-        undo_count = 0
-        undo_errors = 0
-        dest_folders = set()  # Track destination folders to clean up
+        dest_root, moved_files = self.undo_stack.pop()
         
         self.log_message(f"↶ Undoing {len(moved_files)} file(s)...")
         
-        # Reverse the moves (destination back to source)
-        for source_path, dest_path in moved_files:
-            try:
-                # Move file back to original source location
-                src = Path(dest_path)
-                dst = Path(source_path)
-                
-                if src.exists():
-                    # Track the destination folder for cleanup
-                    dest_folders.add(src.parent)
-                    
-                    dst.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.move(str(src), str(dst))
-                    undo_count += 1
-                    self.log_message(f"↶ Restored: {Path(source_path).name}")
-            except Exception as e:
-                undo_errors += 1
-                self.log_message(f"⚠️ Failed to restore {Path(source_path).name}: {str(e)}")
-        
-        # Clean up empty folders that were created during organization
-        folders_deleted = 0
-        for folder in dest_folders:
-            try:
-                # Remove empty directories starting from the deepest level
-                for parent in [folder, *folder.parents]:
-                    if parent.exists() and not list(parent.iterdir()):
-                        try:
-                            parent.rmdir()
-                            folders_deleted += 1
-                            self.log_message(f"🗑️ Removed empty folder: {parent.name}")
-                        except OSError:
-                            break  # Stop if folder is not empty
-            except Exception as e:
-                self.log_message(f"⚠️ Could not remove folder {folder.name}: {str(e)}")
+        # Reverse the moves (destination back to source) in parallel, then drop
+        # the folders organizing created, deepest first, below the destination root
+        executor = ParallelMoveExecutor(self.mover)
+        try:
+            result = revert_moves(
+                [(dest_path, source_path) for source_path, dest_path in moved_files],
+                root=dest_root,
+                executor=executor,
+                on_restored=lambda dest, orig: self.log_message(f"↶ Restored: {Path(orig).name}"),
+                on_failed=lambda dest, orig, error: self.log_message(f"⚠️ Failed to restore {Path(orig).name}: {str(error)}")
+            )
+        finally:
+            executor.shutdown()
+        for folder in result.removed_dirs:
+            self.log_message(f"🗑️ Removed empty folder: {Path(folder).name}")
         
-        self.log_message(f"✅ Undo complete! Restored {undo_count} file(s). Removed {folders_deleted} folder(s). Errors: {undo_errors}")
+        self.log_message(f"✅ Undo complete! Restored {result.restored} file(s). Removed {len(result.removed_dirs)} folder(s). Errors: {result.failed}")
         
         if not self.undo_stack:
             self.undo_btn.setEnabled(False)
@@ -537,6 +559,11 @@ class RishFlow(QMainWindow):
                 }
             """)
     
+    def closeEvent(self, event):
+        # Commit any queued log rows before the window goes away
+        self.activity_log.close()
+        super().closeEvent(event)
+    
     def keyPressEvent(self, event):
         # Keyboard shortcuts
         if event.key() == Qt.Key_F5:
@@ -563,5 +590,7 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # AI Smart worker processes re-import this module in frozen builds
+    multiprocessing.freeze_support()
     main()
     print("🚀 Starting RishFlow v2.0...")
\ No newline at end of file
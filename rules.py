@@ -0,0 +1,289 @@
+"""
+RishFlow v2.0 - Sort Rules
+Declarative sort rules (sort_rules.json) compiled into per-extension dispatch tables
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+RULES_FILE = "sort_rules.json"
+
+_SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+_SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?B)?\s*$', re.IGNORECASE)
+_TIME_FIELD_RE = re.compile(r'\{mtime(?::([^}]*))?\}')
+# strftime directives that only depend on the calendar day
+_DAY_DIRECTIVES = set('YmdyBbjAaUWwGuV%')
+
+
+def extension(name):
+    """Lower-case extension with the dot, like os.path.splitext (".bashrc" and "notes." have none)"""
+    i = name.rfind('.')
+    if i <= 0 or i == len(name) - 1 or not name[:i].strip('.'):
+        return ''
+    return name[i:].lower()
+
+
+def parse_size(value):
+    """Bytes from a number or a string like "100MB" """
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SIZE_RE.match(str(value))
+    if not match:
+        raise ValueError(f"Bad size in sort rules: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[(match.group(2) or 'B').upper()])
+
+
+class Rule:
+    """One rule: conditions that must all hold, and a target folder or a handler.
+
+    Conditions: "extensions" (list, "" means no extension), "min_size" /
+    "max_size" in bytes or "100MB" form, "min_age_days" / "max_age_days",
+    and "name_regex" searched in the file name. All bounds are strict: a
+    min_ rule wants a larger or older file, a max_ rule a smaller or newer
+    one. Ages are measured from the rule set's "time" (mtime by default). "target" is a folder template with the fields
+    {name} {stem} {ext} {EXT} and {mtime:<strftime>}; "handler" names a
+    classifier the caller runs instead (AISmartSorter content classifiers).
+    """
+
+    def __init__(self, spec, index):
+        self.index = index
+        self.priority = spec.get('priority', 0)
+        exts = spec.get('extensions')
+        self.extensions = frozenset(e.lower() for e in exts) if exts is not None else None
+        self.min_size = parse_size(spec['min_size']) if 'min_size' in spec else None
+        self.max_size = parse_size(spec['max_size']) if 'max_size' in spec else None
+        self.min_age = spec['min_age_days'] * 86400 if 'min_age_days' in spec else None
+        self.max_age = spec['max_age_days'] * 86400 if 'max_age_days' in spec else None
+        self.name_regex = spec.get('name_regex')
+        self.handler = spec.get('handler')
+        self.target = Template(spec.get('target', ''))
+        self.needs_size = self.min_size is not None or self.max_size is not None
+        self.needs_time = self.min_age is not None or self.max_age is not None
+        # Only an extension to check: the dispatch table alone decides
+        self.ext_only = not (self.needs_size or self.needs_time or self.name_regex)
+
+    def check(self, size, mtime, now):
+        """Size and age conditions (the regex is handled by the rule set)"""
+        if self.min_size is not None and size <= self.min_size:
+            return False
+        if self.max_size is not None and size >= self.max_size:
+            return False
+        if self.needs_time:
+            age = now - mtime
+            if self.min_age is not None and age <= self.min_age:
+                return False
+            if self.max_age is not None and age >= self.max_age:
+                return False
+        return True
+
+
+class Template:
+    """Folder template, pre-split so constant targets cost nothing to render"""
+
+    def __init__(self, text):
+        self.text = text
+        self.constant = '{' not in text
+        self.needs_time = '{mtime' in text
+        # Date-only templates ("{mtime:%Y-%m-%d}") are rendered once per day
+        specs = _TIME_FIELD_RE.findall(text)
+        self._per_day = (
+            self.needs_time and text.count('{') == len(specs)
+            and all(set(re.findall(r'%(.)', spec)) <= _DAY_DIRECTIVES for spec in specs)
+        )
+        self._day_cache = {}
+
+    def render(self, name, mtime):
+        if self.constant:
+            return self.text
+        if self._per_day:
+            day = time.localtime(mtime)[:3]
+            folder = self._day_cache.get(day)
+            if folder is None:
+                folder = self._day_cache[day] = self.text.format(mtime=datetime.fromtimestamp(mtime))
+            return folder
+        stem, ext = os.path.splitext(name)
+        ext = ext.lstrip('.')
+        return self.text.format(
+            name=name, stem=stem, ext=ext.lower(), EXT=ext.upper(),
+            mtime=datetime.fromtimestamp(mtime) if self.needs_time else None
+        )
+
+
+class RuleSet:
+    """A compiled, priority-ordered list of rules.
+
+    Compilation builds a dispatch table from extension to the candidate rules
+    (in priority order) and joins every name_regex into one alternation, so
+    classifying a file is one dict lookup plus at most one regex match. When
+    the winning candidate only tests the extension and has a constant target,
+    the answer is precomputed per extension.
+
+    "time" in the spec names the timestamp that ages and {mtime} fields use:
+    "mtime" (the default) or "ctime". Callers that stat files through
+    file_stat get the right one; FileRecord callers pass record.mtime and so
+    only suit mtime rule sets.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        # Changes whenever the rules change (used to invalidate cached results)
+        self.fingerprint = hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        self.description = spec.get('description', '')
+        self.ignore_case = spec.get('ignore_case', True)
+        self.time_field = spec.get('time', 'mtime')
+        if self.time_field not in ('mtime', 'ctime'):
+            raise ValueError(f"Bad time in sort rules: {self.time_field!r}")
+        self._st_time = 'st_' + self.time_field
+        rules = [Rule(r, i) for i, r in enumerate(spec.get('rules', []))]
+        # Higher priority first; file order breaks ties
+        rules.sort(key=lambda r: (-r.priority, r.index))
+        self.rules = rules
+        self.default = Template(spec.get('default', 'Misc'))
+
+        generic = tuple(r for r in rules if r.extensions is None)
+        self._general = generic
+        self._dispatch = {}
+        for ext in {e for r in rules if r.extensions is not None for e in r.extensions}:
+            self._dispatch[ext] = tuple(r for r in rules if r.extensions is None or ext in r.extensions)
+
+        # Extension -> final folder when no size/time/name check can change it
+        self._fast = {}
+        for ext, candidates in self._dispatch.items():
+            first = candidates[0]
+            if first.ext_only and not first.handler and first.target.constant:
+                self._fast[ext] = first.target.text
+        self._fast_default = self.default.text if not generic and self.default.constant else None
+
+        # One combined regex; alternatives are tried in priority order
+        self._regex_rules = [r for r in rules if r.name_regex]
+        self._combined = None
+        self._single = {}
+        if self._regex_rules:
+            flags = re.IGNORECASE if self.ignore_case else 0
+            parts = [f"(?P<r{i}>.*?(?:{r.name_regex}))" for i, r in enumerate(self._regex_rules)]
+            self._combined = re.compile('|'.join(parts), flags | re.DOTALL)
+            self._position = {id(r): i for i, r in enumerate(self._regex_rules)}
+            self._single = {id(r): re.compile(r.name_regex, flags) for r in self._regex_rules}
+
+    def file_stat(self, path):
+        """(size, time) of a file, for the stat= argument of match/render/classify"""
+        st = os.stat(path)
+        return st.st_size, getattr(st, self._st_time)
+
+    def candidates(self, ext):
+        return self._dispatch.get(ext, self._general)
+
+    def extensions(self, target=None, handler=None):
+        """Extensions whose rules point at target (or handler)"""
+        found = set()
+        for rule in self.rules:
+            if rule.extensions is None:
+                continue
+            if (target is not None and rule.target.text == target) or \
+                    (handler is not None and rule.handler == handler):
+                found |= rule.extensions
+        return frozenset(found)
+
+    def match(self, name, size=None, mtime=None, stat=None):
+        """Highest-priority Rule for a file, or None when the default applies.
+
+        size and mtime may be left out; stat() -> (size, mtime) is then
+        called at most once, and only if a candidate rule needs them.
+        """
+        ext = extension(name)
+        first_regex = -1  # index in _regex_rules of the first matching pattern
+        now = None
+        for rule in self.candidates(ext):
+            if rule.name_regex:
+                if first_regex == -1:
+                    m = self._combined.match(name)
+                    first_regex = int(m.lastgroup[1:]) if m else len(self._regex_rules)
+                pos = self._position[id(rule)]
+                if pos < first_regex:
+                    continue
+                if pos > first_regex and not self._single[id(rule)].search(name):
+                    # A higher-priority pattern matched but its rule was rejected
+                    continue
+            if rule.needs_size or rule.needs_time:
+                if (size is None or mtime is None) and stat is not None:
+                    size, mtime = stat()
+                    stat = None
+                if now is None:
+                    now = time.time()
+                if not rule.check(size or 0, mtime or 0, now):
+                    continue
+            return rule
+        return None
+
+    def render(self, rule, name, size=None, mtime=None, stat=None):
+        template = rule.target if rule is not None else self.default
+        if template.needs_time and mtime is None and stat is not None:
+            size, mtime = stat()
+        return template.render(name, mtime or 0)
+
+    def classify(self, name, size=None, mtime=None, stat=None):
+        """Target folder for a file (handler rules are not run here)"""
+        ext = extension(name)
+        fast = self._fast.get(ext)
+        if fast is not None:
+            return fast
+        if self._fast_default is not None and ext not in self._dispatch:
+            return self._fast_default
+        if stat is not None and size is None and mtime is None:
+            # Fetch once for both match and render
+            size, mtime = stat()
+        return self.render(self.match(name, size, mtime), name, size, mtime)
+
+
+def rules_path():
+    """sort_rules.json next to the code (or inside the PyInstaller bundle)"""
+    base = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, RULES_FILE)
+
+
+_rulesets = None
+
+
+def load_rules(path=None):
+    """Compile every rule set in the rules file; returns {name: RuleSet}"""
+    with open(path or rules_path(), 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    return {name: RuleSet(name, rs) for name, rs in spec.get('rulesets', {}).items()}
+
+
+def get_ruleset(name):
+    """Compiled rule set by name (compiled once per process), or None"""
+    global _rulesets
+    if _rulesets is None:
+        _rulesets = load_rules()
+    return _rulesets.get(name)
+
+
+def reload_rules(path=None):
+    """Recompile after the rules file was edited"""
+    global _rulesets
+    _rulesets = load_rules(path)
+    return _rulesets
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: per-file rule cost for every rule set
+    import random
+
+    exts = ['.jpg', '.png', '.pdf', '.txt', '.mp4', '.zip', '.py', '.docx', '.iso', '', '.tar.gz', '.JPG']
+    now = time.time()
+    files = [
+        (f"IMG_{i:05d}{random.choice(exts)}", random.randint(0, 300 * 1024 * 1024), now - random.randint(0, 800 * 86400))
+        for i in range(100000)
+    ]
+    for name, ruleset in load_rules().items():
+        start = time.perf_counter()
+        for fname, size, mtime in files:
+            ruleset.classify(fname, size, mtime)
+        elapsed = time.perf_counter() - start
+        print(f"{name:18s} {elapsed / len(files) * 1e9:7.0f} ns/file")
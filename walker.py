@@ -0,0 +1,67 @@
+"""
+RishFlow v2.0 - Parallel Tree Walker
+Lists directories on a bounded thread pool and yields files as they are found
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scanner import ScanStats, scan_folder
+
+DEFAULT_WORKERS = 8
+
+
+def _list_dir(folder):
+    """Worker task: list one directory, returning (files, subdirs, stats)"""
+    stats = ScanStats()
+    subdirs = []
+    try:
+        files = scan_folder(folder, stats, subdirs, regular_only=True)
+    except OSError:
+        # Unreadable or vanished directory - skip it like rglob does
+        files = []
+    return files, subdirs, stats
+
+
+def parallel_walk(root, max_workers=DEFAULT_WORKERS, exclude=(), stats=None):
+    """Yield a FileRecord for every regular file below root.
+
+    Each directory is listed by a pool worker, so up to max_workers readdir
+    round trips are in flight at once (useful on NFS/SMB and deep trees).
+    Files are yielded directory by directory as soon as a listing completes,
+    in no particular order. Directories in exclude (e.g. a destination folder
+    nested in the source) are not descended into. Symlinked directories are
+    not followed.
+    """
+    excluded = {os.path.abspath(p) for p in exclude}
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='rishflow-walk')
+    pending = {pool.submit(_list_dir, os.path.abspath(root))}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs, dir_stats = future.result()
+                if stats is not None:
+                    stats.add(dir_stats)
+                for sub in subdirs:
+                    if os.path.abspath(sub) not in excluded:
+                        pending.add(pool.submit(_list_dir, sub))
+                yield from files
+    finally:
+        # Generator closed early: drop listings that have not started yet
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else '.'
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WORKERS
+    counters = ScanStats()
+    start = time.perf_counter()
+    count = sum(1 for _ in parallel_walk(folder, workers, stats=counters))
+    elapsed = time.perf_counter() - start
+    print(f"{count} files in {elapsed * 1000:.1f} ms with {workers} workers {counters.as_dict()}")
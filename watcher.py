@@ -0,0 +1,187 @@
+"""
+RishFlow v2.0 - Folder Watcher
+Linux inotify watch that hands settled, newly arrived files to a callback in batches
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o0004000
+
+WATCH_MASK = IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "Watch mode needs Linux inotify")
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return _libc
+
+
+def is_supported():
+    """True when inotify is available on this platform"""
+    try:
+        _load_libc()
+        return True
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    """Watch one folder (non-recursively) and report files once they settle.
+
+    A file is "settled" when no event arrived for it for settle seconds and it
+    was either closed after writing / moved in, or its size did not change
+    across a further quiet period (writers that keep the file open). Settled
+    files are handed to callback(paths) at most once per batch_window seconds
+    (or as soon as max_batch files are ready), so a burst of thousands of
+    arrivals becomes a handful of callback calls.
+    """
+
+    def __init__(self, folder, callback, settle=2.0, batch_window=1.0, max_batch=500, on_overflow=None):
+        self.folder = os.path.abspath(folder)
+        self.callback = callback
+        self.settle = settle
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.on_overflow = on_overflow
+        self._pending = {}   # name -> [last_event_time, last_size, closed_after_write]
+        self._ready = []
+        self._ready_since = None
+        self._fd = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.folder), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, os.strerror(err), self.folder)
+        self._fd = fd
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rishflow-watch')
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        poll_interval = min(self.settle, self.batch_window) / 2 or 0.1
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([self._fd], [], [], poll_interval)
+                if readable:
+                    self._read_events()
+                self._promote_settled()
+                self._flush_if_due()
+            # Deliver whatever already settled before shutting down
+            self._flush_if_due(force=True)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        now = time.monotonic()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped by the kernel; the owner should rescan
+                if self.on_overflow:
+                    self.on_overflow()
+                continue
+            if mask & (IN_DELETE_SELF | IN_IGNORED):
+                self._stop.set()
+                continue
+            if not name or mask & IN_ISDIR:
+                continue
+
+            name = os.fsdecode(name)
+            if mask & (IN_MOVED_FROM | IN_DELETE):
+                self._pending.pop(name, None)
+            else:
+                entry = self._pending.setdefault(name, [now, -1, False])
+                entry[0] = now
+                # A later IN_MODIFY means the file is being written again
+                entry[2] = bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO))
+
+    def _promote_settled(self):
+        now = time.monotonic()
+        for name, entry in list(self._pending.items()):
+            if now - entry[0] < self.settle:
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                del self._pending[name]
+                continue
+            if not entry[2] and size != entry[1]:
+                # Still growing (or first check): wait another quiet period
+                entry[0], entry[1] = now, size
+                continue
+            del self._pending[name]
+            if not self._ready:
+                self._ready_since = now
+            self._ready.append(path)
+
+    def _flush_if_due(self, force=False):
+        if not self._ready:
+            return
+        due = (force or len(self._ready) >= self.max_batch
+               or time.monotonic() - self._ready_since >= self.batch_window)
+        if not due:
+            return
+        batch, self._ready = self._ready, []
+        try:
+            self.callback(batch)
+        except Exception as e:
+            print(f"[watcher] Callback error: {e}")